@@ -5,6 +5,13 @@
 
 
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import Future
+import heapq
+import itertools
+import queue
+import threading
+import time
 
 # Command Interface
 class Command(ABC):
@@ -144,6 +151,115 @@ class RemoteControl:
             result += f"[slot {i}] {type(self.on_commands[i]).__name__} | {type(self.off_commands[i]).__name__}\n"
         return result
 
+# Asynchronous Invoker: a priority command queue served by a pool of worker threads.
+# Commands for the same receiver run one at a time in submission order (a "lane"),
+# while different receivers run in parallel. Lower priority numbers run first. The lane
+# is the `key` passed to submit(); without one it falls back to receiver_of(command).
+def receiver_of(command):
+    # A `receiver` attribute wins; otherwise assume the receiver is the first attribute,
+    # as it is for every concrete command in this file
+    if hasattr(command, "receiver"):
+        return command.receiver
+    return next(iter(vars(command).values()), command)
+
+
+class CommandExecutor:
+    def __init__(self, workers=4, max_pending=1000):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._ready = []    # heap of (priority, seq, key): idle lanes with queued work
+        self._lanes = {}    # key -> deque of (priority, seq, command, future)
+        self._pending = 0
+        self._seq = itertools.count()
+        self._shutdown = False
+        self._threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, command, priority=0, timeout=None, key=None):
+        future = Future()
+        key = ("receiver", id(receiver_of(command))) if key is None else ("key", key)
+        with self._not_full:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit after shutdown")
+            if not self._not_full.wait_for(lambda: self._pending < self.max_pending, timeout):
+                raise queue.Full(f"Command queue is full ({self.max_pending} pending)")
+            seq = next(self._seq)
+            lane = self._lanes.get(key)
+            if lane is None:
+                # Idle receiver: its lane becomes ready straight away
+                lane = self._lanes[key] = deque()
+                heapq.heappush(self._ready, (priority, seq, key))
+            lane.append((priority, seq, command, future))
+            self._pending += 1
+            self._not_empty.notify()
+        return future
+
+    def _worker(self):
+        while True:
+            with self._not_empty:
+                self._not_empty.wait_for(lambda: self._ready or self._shutdown)
+                if not self._ready:
+                    return
+                _, _, key = heapq.heappop(self._ready)
+                _, _, command, future = self._lanes[key].popleft()
+                self._pending -= 1
+                self._not_full.notify()
+
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(command.execute())
+                except BaseException as exc:
+                    future.set_exception(exc)
+
+            with self._lock:
+                lane = self._lanes[key]
+                if lane:
+                    # Re-queue the receiver with the priority of its next command
+                    priority, seq, _, _ = lane[0]
+                    heapq.heappush(self._ready, (priority, seq, key))
+                    self._not_empty.notify()
+                else:
+                    del self._lanes[key]
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            self._shutdown = True
+            self._not_empty.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+class AsyncRemoteControl(RemoteControl):
+    def __init__(self, executor: CommandExecutor):
+        super().__init__()
+        self.executor = executor
+
+    def on_button_was_pushed(self, slot, priority=0):
+        return self.executor.submit(self.on_commands[slot], priority)
+
+    def off_button_was_pushed(self, slot, priority=0):
+        return self.executor.submit(self.off_commands[slot], priority)
+
+
+# Simulated slow receiver (e.g. a networked smart bulb)
+class SlowLight(Light):
+    def __init__(self, location="", latency=0.01):
+        super().__init__(location)
+        self.latency = latency
+        self.state_log = []
+
+    def on(self):
+        time.sleep(self.latency)
+        self.state_log.append("ON")
+
+    def off(self):
+        time.sleep(self.latency)
+        self.state_log.append("OFF")
+
 if __name__ == "__main__":
     remote_control = RemoteControl()
 
@@ -168,3 +284,39 @@ if __name__ == "__main__":
     remote_control.off_button_was_pushed(2)
     remote_control.on_button_was_pushed(3)
     remote_control.off_button_was_pushed(3)
+
+    # Async invoker: same remote, but button pushes return futures
+    executor = CommandExecutor(workers=1)  # one worker keeps the demo output readable
+    async_remote = AsyncRemoteControl(executor)
+    async_remote.set_command(0, LightOnCommand(living_room_light), LightOffCommand(living_room_light))
+    async_remote.set_command(3, StereoOnWithCDCommand(stereo), StereoOffCommand(stereo))
+    print("\n------ Async Remote Control -------")
+    futures = [async_remote.on_button_was_pushed(0), async_remote.on_button_was_pushed(3, priority=-1)]
+    for future in futures:
+        future.result()
+    executor.shutdown()
+
+    # Throughput with simulated slow receivers
+    lights = [SlowLight(f"Room {i}") for i in range(4)]
+    commands = [(LightOnCommand(light) if n % 2 == 0 else LightOffCommand(light))
+                for n in range(25) for light in lights]
+
+    start = time.perf_counter()
+    for command in commands:
+        command.execute()
+    serial = time.perf_counter() - start
+
+    for light in lights:
+        light.state_log.clear()
+    executor = CommandExecutor(workers=4, max_pending=16)
+    start = time.perf_counter()
+    futures = [executor.submit(command, key=command.light.location) for command in commands]
+    for future in futures:
+        future.result()
+    pooled = time.perf_counter() - start
+    executor.shutdown()
+
+    # Per-receiver ordering must be preserved
+    assert all(light.state_log == ["ON", "OFF"] * 12 + ["ON"] for light in lights)
+    print(f"\n{len(commands)} commands: serial {len(commands) / serial:.0f}/s, "
+          f"4 workers {len(commands) / pooled:.0f}/s ({serial / pooled:.1f}x)")
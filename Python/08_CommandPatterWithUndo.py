@@ -105,33 +105,224 @@
 
 
 from abc import ABC, abstractmethod
+from array import array
+from collections import deque
+from collections.abc import MutableMapping
 from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+import contextlib
+import io
+import json
+import os
+import sys
+import threading
+import time
+import zlib
 
 
 # === Receiver (Business Logic Layer) ===
 class OrderService:
-    def __init__(self):
+    def __init__(self, verbose: bool = True):
         self.orders = {}  # order_id → status
+        self.verbose = verbose
 
     def place_order(self, order_id: str):
         self.orders[order_id] = "PLACED"
-        print(f"✅ Order {order_id} placed at {datetime.now().strftime('%H:%M:%S')}")
+        if self.verbose:
+            print(f"✅ Order {order_id} placed at {datetime.now().strftime('%H:%M:%S')}")
 
     def cancel_order(self, order_id: str):
         if self.orders.get(order_id) == "PLACED":
             self.orders[order_id] = "CANCELLED"
-            print(f"❌ Order {order_id} cancelled at {datetime.now().strftime('%H:%M:%S')}")
-        else:
+            if self.verbose:
+                print(f"❌ Order {order_id} cancelled at {datetime.now().strftime('%H:%M:%S')}")
+        elif self.verbose:
             print(f"⚠️ Cannot cancel order {order_id} (status: {self.orders.get(order_id)})")
 
     def ship_order(self, order_id: str):
         if self.orders.get(order_id) == "PLACED":
             self.orders[order_id] = "SHIPPED"
-            print(f"📦 Order {order_id} shipped at {datetime.now().strftime('%H:%M:%S')}")
-        else:
+            if self.verbose:
+                print(f"📦 Order {order_id} shipped at {datetime.now().strftime('%H:%M:%S')}")
+        elif self.verbose:
             print(f"⚠️ Cannot ship order {order_id} (status: {self.orders.get(order_id)})")
 
 
+# === Compact Order Store ===
+# A drop-in replacement for the `orders` dict. Order ids of the form "<prefix><number>"
+# are stored as integers in an array('q') (one row per order), statuses as one byte per
+# row in a bytearray, and an open-addressing hash table in an array('i') maps the id
+# number to its row. That is ~20 bytes per order instead of a dict entry plus a string.
+# Any other id ("A-1", "ORD-007") is interned in a side table and stored as a negative
+# key, so every id the dict accepted still works, just without the savings. Statuses
+# are limited to the ones OrderService sets; storing None or any other value raises.
+ORDER_STATUSES = (None, "PLACED", "CANCELLED", "SHIPPED")
+_STATUS_CODES = {status: code for code, status in enumerate(ORDER_STATUSES)}
+_HASH_MULTIPLIER = 0x9E3779B97F4A7C15  # 2^64 / golden ratio
+_HASH_MASK = (1 << 64) - 1
+
+
+class CompactOrderStore(MutableMapping):
+    def __init__(self, prefix: str = "ORD-", capacity: int = 1024):
+        self.prefix = prefix
+        self._ids = array("q")
+        self._statuses = bytearray()
+        self._names = []       # side table: ids not of the "<prefix><number>" form
+        self._name_keys = {}   # id -> negative key
+        size = 8
+        while size * 2 < capacity * 3:
+            size *= 2
+        self._slots = array("i", [0]) * size  # row + 1, 0 = empty slot
+        self._shift = 64 - (size.bit_length() - 1)
+        self._live = 0
+
+    def _key(self, order_id: str, insert: bool = False) -> int:
+        number = order_id[len(self.prefix):]
+        if (order_id.startswith(self.prefix) and number.isascii() and number.isdigit()
+                and len(number) <= 18 and number == str(int(number))):
+            return int(number)
+        key = self._name_keys.get(order_id)
+        if key is None:
+            if not insert:
+                raise KeyError(order_id)
+            self._names.append(sys.intern(order_id))
+            key = self._name_keys[order_id] = -len(self._names)
+        return key
+
+    def _order_id(self, key: int) -> str:
+        return f"{self.prefix}{key}" if key >= 0 else self._names[-key - 1]
+
+    def _find(self, key: int):
+        """Return (slot, row); row is -1 when the key is not stored."""
+        slots, ids = self._slots, self._ids
+        mask = len(slots) - 1
+        # Fibonacci hashing: the high bits of the product mix every bit of the key
+        slot = ((key * _HASH_MULTIPLIER) & _HASH_MASK) >> self._shift
+        while True:
+            row = slots[slot] - 1
+            if row < 0 or ids[row] == key:
+                return slot, row
+            slot = (slot + 1) & mask
+
+    def _grow(self):
+        self._slots = array("i", [0]) * (len(self._slots) * 2)
+        self._shift -= 1
+        for row, key in enumerate(self._ids):
+            slot, _ = self._find(key)
+            self._slots[slot] = row + 1
+
+    def _row(self, order_id: str) -> int:
+        try:
+            row = self._find(self._key(order_id))[1]
+        except KeyError:
+            return -1
+        return row if row >= 0 and self._statuses[row] else -1
+
+    def __getitem__(self, order_id: str) -> str:
+        row = self._row(order_id)
+        if row < 0:
+            raise KeyError(order_id)
+        return ORDER_STATUSES[self._statuses[row]]
+
+    def get(self, order_id: str, default=None):
+        row = self._row(order_id)
+        return ORDER_STATUSES[self._statuses[row]] if row >= 0 else default
+
+    def __setitem__(self, order_id: str, status: str):
+        code = _STATUS_CODES.get(status)
+        if not code:  # None would mark the row live with no status
+            raise ValueError(f"Unknown order status {status!r}")
+        key = self._key(order_id, insert=True)
+        slot, row = self._find(key)
+        if row < 0:
+            row = len(self._ids)
+            self._ids.append(key)
+            self._statuses.append(0)
+            self._slots[slot] = row + 1
+            if len(self._ids) * 3 > len(self._slots) * 2:
+                self._grow()
+        if not self._statuses[row]:
+            self._live += 1
+        self._statuses[row] = code
+
+    def __delitem__(self, order_id: str):
+        row = self._row(order_id)
+        if row < 0:
+            raise KeyError(order_id)
+        self._statuses[row] = 0  # the row stays reserved for the id
+        self._live -= 1
+
+    def __len__(self) -> int:
+        return self._live
+
+    def __iter__(self):
+        statuses = self._statuses
+        for row, key in enumerate(self._ids):
+            if statuses[row]:
+                yield self._order_id(key)
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+    # Bulk queries
+    def get_many(self, order_ids):
+        return [self.get(order_id) for order_id in order_ids]
+
+    def count_by_status(self) -> dict:
+        return {status: self._statuses.count(code) for code, status in enumerate(ORDER_STATUSES) if code}
+
+    def ids_with_status(self, status: str):
+        code, statuses, ids = _STATUS_CODES[status], self._statuses, self._ids
+        row = statuses.find(code)
+        while row >= 0:
+            yield self._order_id(ids[row])
+            row = statuses.find(code, row + 1)
+
+
+class CompactOrderService(OrderService):
+    def __init__(self, verbose: bool = True, prefix: str = "ORD-"):
+        super().__init__(verbose)
+        self.orders = CompactOrderStore(prefix)
+
+
+# === Concurrent Order Service ===
+# Each order id hashes to one of `stripes` locks, so a read-then-write transition on an
+# order is atomic while orders on other stripes proceed in parallel. With enough stripes
+# two different orders only contend when their ids share a stripe. Uses the plain dict
+# store: CompactOrderStore grows its shared arrays on insert and is not thread-safe.
+class ConcurrentOrderService(OrderService):
+    def __init__(self, verbose: bool = True, stripes: int = 1024):
+        super().__init__(verbose)
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def lock_for(self, order_id: str) -> threading.Lock:
+        return self._locks[hash(order_id) % len(self._locks)]
+
+    def compare_and_set(self, order_id: str, expected, status: str) -> bool:
+        with self.lock_for(order_id):
+            if self.orders.get(order_id) != expected:
+                return False
+            self.orders[order_id] = status
+            return True
+
+    def place_order(self, order_id: str):
+        with self.lock_for(order_id):
+            super().place_order(order_id)
+        return True
+
+    def cancel_order(self, order_id: str) -> bool:
+        with self.lock_for(order_id):
+            cancelled = self.orders.get(order_id) == "PLACED"
+            super().cancel_order(order_id)
+        return cancelled
+
+    def ship_order(self, order_id: str) -> bool:
+        with self.lock_for(order_id):
+            shipped = self.orders.get(order_id) == "PLACED"
+            super().ship_order(order_id)
+        return shipped
+
+
 # === Command Interface ===
 class Command(ABC):
     @abstractmethod
@@ -148,8 +339,10 @@ class PlaceOrderCommand(Command):
     def __init__(self, order_service: OrderService, order_id: str):
         self.order_service = order_service
         self.order_id = order_id
+        self.prev_status = None
 
     def execute(self):
+        self.prev_status = self.order_service.orders.get(self.order_id)
         self.order_service.place_order(self.order_id)
 
     def undo(self):
@@ -190,6 +383,36 @@ class ShipOrderCommand(Command):
             print(f"Cannot undo shipping for order {self.order_id}")
 
 
+# === Composite Command (atomic batch) ===
+# Every order command records the status it found (prev_status), so the batch keeps no
+# bookkeeping of its own while it runs. If a command raises, the batch walks back through
+# the commands that completed, newest first, restoring each one's prev_status; the
+# oldest write for an order wins, which is its status before the batch. A command that
+# raises is expected to leave its order unchanged, as the order commands do.
+class BatchCommand(Command):
+    def __init__(self, commands):
+        self.commands = list(commands)
+
+    def execute(self):
+        done = 0
+        try:
+            for command in self.commands:
+                command.execute()
+                done += 1
+        except Exception:
+            for command in reversed(self.commands[:done]):
+                orders = command.order_service.orders
+                if command.prev_status is None:
+                    orders.pop(command.order_id, None)
+                else:
+                    orders[command.order_id] = command.prev_status
+            raise
+
+    def undo(self):
+        for command in reversed(self.commands):
+            command.undo()
+
+
 # === Invoker ===
 class CommandManager:
     def __init__(self):
@@ -199,6 +422,13 @@ class CommandManager:
         command.execute()
         self._history.append(command)
 
+    def execute_batch(self, commands):
+        """Run commands atomically as one history entry; a failure rolls back the whole batch."""
+        batch = BatchCommand(commands)
+        batch.execute()
+        self._history.append(batch)
+        return batch
+
     def undo_last(self):
         if self._history:
             last_command = self._history.pop()
@@ -208,6 +438,321 @@ class CommandManager:
             print("⚠️ No commands to undo")
 
 
+# === Bounded Undo History ===
+# Keeps (command class, order_id, prev_status) tuples instead of full command objects,
+# capped by both count and estimated bytes. The oldest records are folded into a
+# checkpoint once a cap is hit: they can no longer be undone, and the checkpoint only
+# remembers how many commands it covers. Undone records move to a redo stack, so
+# several undos can be redone in order until a new command is executed.
+_RECORD_BYTES = sys.getsizeof((None, None, None))
+
+
+class BoundedCommandManager(CommandManager):
+    def __init__(self, order_service: OrderService, max_commands: int = 10_000,
+                 max_bytes: int = 1 << 20):
+        super().__init__()
+        self.order_service = order_service
+        self.max_commands = max_commands
+        self.max_bytes = max_bytes
+        self._history = deque()
+        self._redo = []
+        self._bytes = 0
+        self.checkpoint_seq = 0  # commands folded into the checkpoint
+
+    @staticmethod
+    def _record_size(record) -> int:
+        if record[0] is BatchCommand:
+            return _RECORD_BYTES + sys.getsizeof(record[1]) + sum(map(BoundedCommandManager._record_size, record[1]))
+        return _RECORD_BYTES + sys.getsizeof(record[1])
+
+    def _to_record(self, command: Command):
+        if isinstance(command, BatchCommand):
+            return (BatchCommand, tuple(map(self._to_record, command.commands)), None)
+        return (type(command), command.order_id, getattr(command, "prev_status", None))
+
+    def _from_record(self, record) -> Command:
+        command_type, order_id, prev_status = record
+        if command_type is BatchCommand:
+            return BatchCommand(map(self._from_record, order_id))
+        command = command_type(self.order_service, order_id)
+        if prev_status is not None:
+            command.prev_status = prev_status
+        return command
+
+    def _push(self, record):
+        self._history.append(record)
+        self._bytes += self._record_size(record)
+        while len(self._history) > self.max_commands or self._bytes > self.max_bytes:
+            self._bytes -= self._record_size(self._history.popleft())
+            self.checkpoint_seq += 1
+
+    def execute_command(self, command: Command):
+        command.execute()
+        self._push(self._to_record(command))
+        self._redo.clear()
+
+    def execute_batch(self, commands):
+        batch = BatchCommand(commands)
+        batch.execute()
+        self._push(self._to_record(batch))
+        self._redo.clear()
+        return batch
+
+    def undo_last(self):
+        if self._history:
+            record = self._history.pop()
+            self._bytes -= self._record_size(record)
+            print("↩️ Undoing last command...")
+            self._from_record(record).undo()
+            self._redo.append(record)
+        else:
+            print("⚠️ No commands to undo")
+
+    def redo_last(self):
+        if self._redo:
+            command = self._from_record(self._redo.pop())
+            print("↪️ Redoing last undone command...")
+            command.execute()
+            self._push(self._to_record(command))
+        else:
+            print("⚠️ No commands to redo")
+
+
+# === Command Journal (crash recovery) ===
+# Every executed command is appended to a log file as "seq<TAB>CommandType<TAB>order_id".
+# fsync is group-committed: one sync covers up to `group_size` records, and a background
+# flusher syncs whatever is pending once the oldest unsynced record is `max_delay` seconds
+# old, so the disk cost is amortized and the durability window stays bounded. A snapshot
+# stores the full order state plus the last sequence number it includes; replay loads the
+# snapshot and then re-executes only the log records written after it. Reopening a log
+# drops a torn last line (a crash mid-write) and continues numbering after the last record.
+COMMAND_TYPES = {cls.__name__: cls for cls in (PlaceOrderCommand, CancelOrderCommand, ShipOrderCommand)}
+
+
+class CommandJournal:
+    def __init__(self, path: str, group_size: int = 256, max_delay: float = 0.01):
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self.group_size = group_size
+        self.max_delay = max_delay
+        self._seq = self._recover()
+        self._unsynced = 0
+        self._first_unsynced = 0.0
+        self._closed = False
+        self._lock = threading.Lock()
+        self._pending = threading.Condition(self._lock)
+        self._file = open(path, "a", encoding="utf-8", buffering=1 << 16)
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def _recover(self) -> int:
+        """Truncate a torn last line and return the last sequence number on disk."""
+        seq = 0
+        if os.path.exists(self.path):
+            with open(self.path, "r+b") as f:
+                end = f.seek(0, os.SEEK_END)
+                position, tail = end, b""
+                while position > 0 and tail.count(b"\n") < 2:
+                    step = min(position, 1 << 12)
+                    position -= step
+                    f.seek(position)
+                    tail = f.read(step) + tail
+                complete = tail.rfind(b"\n") + 1
+                if position + complete < end:
+                    f.truncate(position + complete)
+                lines = tail[:complete].splitlines()
+                if lines:
+                    seq = int(lines[-1].split(b"\t", 1)[0])
+        if not seq and os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                seq = json.load(f)["seq"]
+        return seq
+
+    @property
+    def seq(self) -> int:
+        return self._seq
+
+    def advance_seq(self, seq: int):
+        """Continue numbering after `seq` if it is ahead of the journal (e.g. after a replay)."""
+        with self._lock:
+            self._seq = max(self._seq, seq)
+
+    def append(self, command: Command):
+        self.append_many((command,))
+
+    def append_many(self, commands):
+        commands = [(type(command).__name__, command.order_id) for command in commands]
+        if not commands:
+            return
+        with self._lock:
+            # Numbering and writing under one lock keeps sequence numbers unique and in file order
+            seq = self._seq
+            self._file.write("".join(f"{seq + i}\t{type_name}\t{order_id}\n"
+                                     for i, (type_name, order_id) in enumerate(commands, 1)))
+            self._seq = seq + len(commands)
+            if not self._unsynced:
+                self._first_unsynced = time.monotonic()
+                self._pending.notify()
+            self._unsynced += len(commands)
+            if self._unsynced >= self.group_size:
+                self._sync()
+
+    def _flush_loop(self):
+        with self._lock:
+            while not self._closed:
+                if not self._unsynced:
+                    self._pending.wait()
+                    continue
+                remaining = self._first_unsynced + self.max_delay - time.monotonic()
+                if remaining > 0:
+                    self._pending.wait(remaining)
+                else:
+                    self._sync()
+
+    def _sync(self):
+        if self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def sync(self):
+        with self._lock:
+            self._sync()
+
+    def snapshot(self, order_service: OrderService):
+        self.sync()
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"seq": self._seq, "orders": dict(order_service.orders)}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+    def load_snapshot(self, order_service: OrderService) -> int:
+        """Load the snapshot into order_service; returns the last sequence number it covers."""
+        if not os.path.exists(self.snapshot_path):
+            return 0
+        with open(self.snapshot_path, encoding="utf-8") as f:
+            snapshot = json.load(f)
+        order_service.orders.update(snapshot["orders"])
+        return snapshot["seq"]
+
+    def records(self, after_seq: int = 0):
+        """Yield (seq, command type name, order_id) for log records after `after_seq`."""
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # torn write from a crash
+                seq_text, type_name, order_id = line.rstrip("\n").split("\t")
+                seq = int(seq_text)
+                if seq > after_seq:
+                    yield seq, type_name, order_id
+
+    def replay(self, order_service: OrderService) -> int:
+        """Rebuild order_service from the snapshot and log; returns the number of replayed commands."""
+        seq = self.load_snapshot(order_service)
+        replayed = 0
+        for seq, type_name, order_id in self.records(seq):
+            COMMAND_TYPES[type_name](order_service, order_id).execute()
+            replayed += 1
+        self.advance_seq(seq)
+        return replayed
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._pending.notify()
+        self._flusher.join()
+        self.sync()
+        self._file.close()
+
+
+# Undo is journaled as compensating commands: each undone command's effect on its order
+# is logged as the command that reproduces it on replay (PLACED again, or CANCELLED).
+COMPENSATING_COMMANDS = {"PLACED": PlaceOrderCommand, "CANCELLED": CancelOrderCommand}
+
+
+class JournaledCommandManager(CommandManager):
+    def __init__(self, journal: CommandJournal):
+        super().__init__()
+        self.journal = journal
+
+    def execute_command(self, command: Command):
+        super().execute_command(command)
+        self.journal.append(command)
+
+    def execute_batch(self, commands):
+        batch = super().execute_batch(commands)
+        self.journal.append_many(batch.commands)
+        return batch
+
+    def undo_last(self):
+        if not self._history:
+            print("⚠️ No commands to undo")
+            return
+        last_command = self._history.pop()
+        print("↩️ Undoing last command...")
+        commands = last_command.commands if isinstance(last_command, BatchCommand) else [last_command]
+        compensations = []
+        for command in reversed(commands):
+            orders = command.order_service.orders
+            before = orders.get(command.order_id)
+            command.undo()
+            after = orders.get(command.order_id)
+            if after != before:
+                compensations.append(COMPENSATING_COMMANDS[after](command.order_service, command.order_id))
+        self.journal.append_many(compensations)
+
+
+# === Parallel Partitioned Replay ===
+# Commands on different orders never interact, so the journal can be split by order id
+# into independent partitions. Each worker process scans the log itself, keeps only the
+# records of its own partition, seeds the orders they touch from the snapshot and
+# replays them in log order; the parent merges the disjoint results. The parent never
+# parses the log, so the scan is spread across workers along with the replay.
+def _replay_partition(task):
+    log_path, snapshot_path, after_seq, partition, partitions = task
+    records = []
+    last_seq = after_seq
+    with open(log_path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # torn write from a crash
+            seq_text, type_name, order_id = line[:-1].split(b"\t")
+            # crc32 rather than hash(): str hashes are randomized per worker process
+            if zlib.crc32(order_id) % partitions == partition and int(seq_text) > after_seq:
+                records.append((type_name.decode(), order_id.decode()))
+                last_seq = int(seq_text)
+    order_service = OrderService(verbose=False)
+    orders = order_service.orders
+    touched = {order_id for _, order_id in records}
+    if touched and os.path.exists(snapshot_path):
+        with open(snapshot_path, encoding="utf-8") as f:
+            snapshot = json.load(f)["orders"]
+        orders.update((order_id, snapshot[order_id]) for order_id in touched if order_id in snapshot)
+    for type_name, order_id in records:
+        COMMAND_TYPES[type_name](order_service, order_id).execute()
+    return orders, len(records), last_seq
+
+
+class PartitionedReplayer:
+    def __init__(self, workers: int = os.cpu_count() or 1):
+        self.workers = workers
+
+    def replay(self, journal: CommandJournal, order_service: OrderService) -> int:
+        """Same result as CommandJournal.replay; returns the number of replayed commands."""
+        seq = journal.load_snapshot(order_service)
+        tasks = [(journal.path, journal.snapshot_path, seq, partition, self.workers)
+                 for partition in range(self.workers)]
+        replayed = 0
+        with ProcessPoolExecutor(self.workers) as pool:
+            for orders, count, last_seq in pool.map(_replay_partition, tasks):
+                order_service.orders.update(orders)
+                replayed += count
+                journal.advance_seq(last_seq)
+        return replayed
+
+
 # === Client Code ===
 if __name__ == "__main__":
     service = OrderService()
@@ -228,3 +773,287 @@ if __name__ == "__main__":
 
     print("\n📜 Final Order States:")
     print(service.orders)
+
+    # Journaling and crash recovery
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "orders.log")
+        n = 100_000
+
+        quiet_service = OrderService(verbose=False)
+        journal = CommandJournal(log_path)
+        journaled = JournaledCommandManager(journal)
+        start = time.perf_counter()
+        for i in range(n):
+            journaled.execute_command(PlaceOrderCommand(quiet_service, f"ORD-{i}"))
+            if i == n // 2:
+                journal.snapshot(quiet_service)
+            if i % 3 == 0:
+                journaled.execute_command(ShipOrderCommand(quiet_service, f"ORD-{i}"))
+        journal.close()
+        elapsed = time.perf_counter() - start
+        total = journal.seq
+        print(f"\n📝 Journaled {total} commands: {total / elapsed:,.0f} commands/s")
+
+        recovered = OrderService(verbose=False)
+        journal = CommandJournal(log_path)
+        start = time.perf_counter()
+        replayed = journal.replay(recovered)
+        elapsed = time.perf_counter() - start
+        journal.close()
+        assert recovered.orders == quiet_service.orders
+        print(f"🔁 Replayed {replayed} commands after snapshot in {elapsed:.2f}s "
+              f"({replayed / elapsed:,.0f} commands/s)")
+
+        # Undo is journaled, reopening continues the sequence, a torn tail is dropped,
+        # and an idle journal still reaches the disk within max_delay
+        log_path = os.path.join(tmp, "undo.log")
+        live = OrderService(verbose=False)
+        journal = CommandJournal(log_path, max_delay=0.01)
+        journaled = JournaledCommandManager(journal)
+        journaled.execute_command(PlaceOrderCommand(live, "ORD-1"))
+        journaled.execute_command(ShipOrderCommand(live, "ORD-1"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            journaled.undo_last()
+        time.sleep(0.1)
+        assert os.path.getsize(log_path) > 0
+        journal.snapshot(live)
+        journal.close()
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write("4\tPlaceOrd")  # simulate a crash mid-write
+        journal = CommandJournal(log_path)
+        journaled = JournaledCommandManager(journal)
+        journaled.execute_command(PlaceOrderCommand(live, "ORD-2"))
+        journal.close()
+        recovered = OrderService(verbose=False)
+        journal = CommandJournal(log_path)
+        journal.replay(recovered)
+        journal.close()
+        assert recovered.orders == live.orders == {"ORD-1": "PLACED", "ORD-2": "PLACED"}
+        print(f"🔁 Recovered after undo, reopen and torn write: {recovered.orders}")
+
+        # Appends from several threads get unique sequence numbers in file order
+        journal = CommandJournal(os.path.join(tmp, "threads.log"))
+        appenders = [threading.Thread(target=lambda t=t: [journal.append(PlaceOrderCommand(live, f"ORD-{t}-{i}"))
+                                                          for i in range(2_000)]) for t in range(8)]
+        for appender in appenders:
+            appender.start()
+        for appender in appenders:
+            appender.join()
+        journal.close()
+        assert [seq for seq, _, _ in journal.records()] == list(range(1, 16_001)) == list(range(1, journal.seq + 1))
+
+    # Bounded history: memory of 1M executed commands, unbounded vs capped
+    import tracemalloc
+
+    for manager_type in (CommandManager, BoundedCommandManager):
+        quiet_service = OrderService(verbose=False)
+        order_ids = [f"ORD-{i}" for i in range(1_000_000)]
+        bounded = manager_type is BoundedCommandManager
+        history_manager = manager_type(quiet_service) if bounded else manager_type()
+        quiet_service.orders = dict.fromkeys(order_ids, "PLACED")  # only trace the history
+        tracemalloc.start()
+        for order_id in order_ids:
+            history_manager.execute_command(PlaceOrderCommand(quiet_service, order_id))
+        history_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"🧠 {manager_type.__name__}: {history_bytes / 1e6:.1f} MB for "
+              f"{len(order_ids):,} commands ({len(history_manager._history):,} undoable)")
+
+    print("\n🔄 Multi-level undo/redo:")
+    service = OrderService()
+    history_manager = BoundedCommandManager(service, max_commands=3)
+    for order_id in ("ORD-1", "ORD-2", "ORD-3", "ORD-4"):
+        history_manager.execute_command(PlaceOrderCommand(service, order_id))
+    history_manager.undo_last()
+    history_manager.undo_last()
+    history_manager.redo_last()
+    history_manager.redo_last()
+    print(service.orders, f"(checkpoint covers {history_manager.checkpoint_seq} command)")
+
+    # Compact order store: memory (including the id strings) and lookups for 200k orders
+    n = 200_000
+    for service_type in (OrderService, CompactOrderService):
+        tracemalloc.start()
+        quiet_service = service_type(verbose=False)
+        for i in range(n):
+            quiet_service.place_order(f"ORD-{i}")
+        store_bytes = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        order_ids = [f"ORD-{i}" for i in range(n)]
+        for order_id in order_ids[::3]:
+            quiet_service.ship_order(order_id)
+        start = time.perf_counter()
+        for order_id in order_ids:
+            quiet_service.orders.get(order_id)
+        elapsed = time.perf_counter() - start
+        print(f"📦 {service_type.__name__}: {store_bytes / n:.0f} bytes/order, "
+              f"{n / elapsed:,.0f} lookups/s")
+    print(quiet_service.orders.count_by_status())
+
+    # Ids outside the numeric form fall back to the side table; strided ids hash evenly
+    compact = CompactOrderService(verbose=False)
+    for order_id in ("A-1", "ORD-007", "ORD-²", "ORD-7"):
+        compact.place_order(order_id)
+    compact.ship_order("ORD-007")
+    assert dict(compact.orders) == {"A-1": "PLACED", "ORD-007": "SHIPPED", "ORD-²": "PLACED", "ORD-7": "PLACED"}
+    assert repr(compact.orders) == repr(dict(compact.orders))
+    try:
+        compact.orders["ORD-8"] = None
+    except ValueError as exc:
+        assert len(compact.orders) == 4 and "ORD-8" not in compact.orders
+        print(f"📦 {exc}")
+    for stride in (1, 1024):
+        store = CompactOrderStore()
+        start = time.perf_counter()
+        for i in range(20_000):
+            store[f"ORD-{i * stride}"] = "PLACED"
+        print(f"📦 20k ids with stride {stride}: inserted in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # Atomic batches: one history entry, all-or-nothing
+    class PaymentDeclinedCommand(PlaceOrderCommand):
+        def execute(self):
+            raise RuntimeError("payment declined")
+
+        def undo(self):
+            pass
+
+    print("\n🧺 Batch with a failing command:")
+    service = OrderService()
+    manager = CommandManager()
+    try:
+        manager.execute_batch([PlaceOrderCommand(service, "ORD-2001"),
+                               PlaceOrderCommand(service, "ORD-2002"),
+                               PaymentDeclinedCommand(service, "ORD-2002")])
+    except RuntimeError as exc:
+        print(f"Batch rolled back ({exc}): {service.orders}")
+
+    manager.execute_batch([PlaceOrderCommand(service, "ORD-2003"), ShipOrderCommand(service, "ORD-2003")])
+    manager.undo_last()  # reverts the whole batch
+    print(service.orders)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager_factories = {
+            "CommandManager": lambda svc: CommandManager(),
+            "BoundedCommandManager": lambda svc: BoundedCommandManager(svc),
+            "JournaledCommandManager": lambda svc: JournaledCommandManager(
+                CommandJournal(os.path.join(tmp, "batch.log"))),
+        }
+        # Ingestion messages of 500 places followed by 500 ships, run once through an
+        # execute_command loop and once through execute_batch on a fresh service. Most of
+        # the cost is executing the command objects themselves, which both paths share,
+        # so batching only saves the per-command manager call (and, when journaled, the
+        # per-command journal append).
+        def messages(order_service, run):
+            return [[PlaceOrderCommand(order_service, f"ORD-{run}-{b}-{i}") for i in range(500)] +
+                    [ShipOrderCommand(order_service, f"ORD-{run}-{b}-{i}") for i in range(500)] for b in range(100)]
+
+        for name, make_manager in manager_factories.items():
+            timings = []
+            for run in ("loop", "batch"):
+                quiet_service = OrderService(verbose=False)
+                batch_manager = make_manager(quiet_service)
+                batches = messages(quiet_service, run)
+                start = time.perf_counter()
+                for batch in batches:
+                    if run == "loop":
+                        for command in batch:
+                            batch_manager.execute_command(command)
+                    else:
+                        batch_manager.execute_batch(batch)
+                timings.append(time.perf_counter() - start)
+                if isinstance(batch_manager, JournaledCommandManager):
+                    batch_manager.journal.close()
+                assert set(quiet_service.orders.values()) == {"SHIPPED"}
+            looped, batched = timings
+            print(f"⚡ {name}: execute_batch {looped / batched:.1f}x faster than execute_command loop "
+                  f"({100_000 / batched:,.0f} commands/s)")
+
+    # Concurrent order service: ship/cancel races must pick exactly one winner per order
+    import random
+
+    n = 50_000
+    order_ids = [f"ORD-{i}" for i in range(n)]
+    for thread_count in (1, 2, 4, 8):
+        concurrent_service = ConcurrentOrderService(verbose=False)
+        for order_id in order_ids:
+            concurrent_service.place_order(order_id)
+        wins = [[] for _ in range(thread_count)]
+
+        def worker(results, seed):
+            rng = random.Random(seed)
+            for order_id in order_ids:
+                action = concurrent_service.ship_order if rng.random() < 0.5 else concurrent_service.cancel_order
+                if action(order_id):
+                    results.append((order_id, "SHIPPED" if action == concurrent_service.ship_order else "CANCELLED"))
+
+        threads = [threading.Thread(target=worker, args=(wins[t], t)) for t in range(thread_count)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        winners = dict(win for results in wins for win in results)
+        assert sum(map(len, wins)) == n == len(winners)  # one successful transition per order
+        assert winners == concurrent_service.orders       # final state matches the winner
+        print(f"🔒 {thread_count} threads: {thread_count * n / elapsed:,.0f} transitions/s, invariants hold")
+
+    # Parallel vs sequential replay of a 750k-command journal
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "orders.log")
+        journal = CommandJournal(log_path)
+        rng = random.Random(42)
+        history = [("PlaceOrderCommand", f"ORD-{i}") for i in range(500_000)]
+        history += [(rng.choice(("ShipOrderCommand", "CancelOrderCommand")), f"ORD-{i}")
+                    for i in range(500_000) if rng.random() < 0.5]
+        quiet_service = OrderService(verbose=False)
+        commands = [COMMAND_TYPES[type_name](quiet_service, order_id) for type_name, order_id in history]
+        # Snapshot part-way through, so later ships and cancels hit orders placed before it
+        journal.append_many(commands[:400_000])
+        for command in commands[:400_000]:
+            command.execute()
+        journal.snapshot(quiet_service)
+        journal.append_many(commands[400_000:])
+        journal.close()
+
+        # Both paths load the same snapshot and replay the 350k records after it
+        sequential_service = OrderService(verbose=False)
+        journal = CommandJournal(log_path)
+        start = time.perf_counter()
+        replayed = journal.replay(sequential_service)
+        sequential = time.perf_counter() - start
+        journal.close()
+        print(f"\n⏱️ Sequential replay: {replayed / sequential:,.0f} commands/s "
+              f"({replayed:,} replayed after the snapshot)")
+
+        for workers in (2, 4):
+            parallel_service = OrderService(verbose=False)
+            journal = CommandJournal(log_path)
+            start = time.perf_counter()
+            assert PartitionedReplayer(workers).replay(journal, parallel_service) == replayed
+            elapsed = time.perf_counter() - start
+            assert journal.seq == len(history)
+            journal.close()
+            assert parallel_service.orders == sequential_service.orders
+            print(f"⏱️ Partitioned replay, {workers} workers on {os.cpu_count()} CPUs: "
+                  f"{replayed / elapsed:,.0f} commands/s ({sequential / elapsed:.1f}x)")
+
+        # An order placed before the snapshot and shipped after it
+        log_path = os.path.join(tmp, "small.log")
+        live = OrderService(verbose=False)
+        journal = CommandJournal(log_path)
+        journaled = JournaledCommandManager(journal)
+        journaled.execute_command(PlaceOrderCommand(live, "ORD-1"))
+        journal.snapshot(live)
+        journaled.execute_command(ShipOrderCommand(live, "ORD-1"))
+        journal.close()
+        for replayer in (CommandJournal.replay, PartitionedReplayer(2).replay):
+            recovered = OrderService(verbose=False)
+            journal = CommandJournal(log_path)
+            replayer(journal, recovered)
+            journal.close()
+            assert recovered.orders == live.orders == {"ORD-1": "SHIPPED"}
+        print("⏱️ Sequential and partitioned replay agree across a snapshot")
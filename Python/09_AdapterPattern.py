@@ -5,34 +5,620 @@
 # Pattern shines.
 
 
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+import asyncio
+import json
+import math
+import queue
+import random
+import threading
+import time
+import timeit
+import uuid
+
+
 # Target interface
 class PaymentProcessor:
-    def pay(self, amount: float):
+    def pay(self, amount: float, idempotency_key: str = None):
         pass
 
 # Adaptees: 3rd-party APIs with different interfaces
 class StripeAPI:
-    def charge_card(self, amount):
+    def charge_card(self, amount, idempotency_key=None):
+        # The gateway charges a given idempotency key at most once
         print(f"💳 Charged ${amount} using Stripe")
 
+    def charge_cards(self, amounts, idempotency_keys=None):
+        # Batch endpoint: one round trip for many charges
+        print(f"💳 Charged {len(amounts)} cards (${sum(amounts)}) using Stripe")
+        return [f"stripe-{i}" for i in range(len(amounts))]
+
 class PayPalAPI:
-    def make_payment(self, value):
+    def make_payment(self, value, request_id=None):
         print(f"💰 Paid ${value} using PayPal")
 
+    def make_payments(self, values, request_ids=None):
+        print(f"💰 Paid {len(values)} payments (${sum(values)}) using PayPal")
+        return [f"paypal-{i}" for i in range(len(values))]
+
 # Adapters: adapt 3rd-party APIs to PaymentProcessor interface
 class StripeAdapter(PaymentProcessor):
     def __init__(self, stripe_api: StripeAPI):
         self.stripe = stripe_api
 
-    def pay(self, amount: float):
-        self.stripe.charge_card(amount)
+    def pay(self, amount: float, idempotency_key: str = None):
+        self.stripe.charge_card(amount, idempotency_key)
 
 class PayPalAdapter(PaymentProcessor):
     def __init__(self, paypal_api: PayPalAPI):
         self.paypal = paypal_api
 
-    def pay(self, amount: float):
-        self.paypal.make_payment(amount)
+    def pay(self, amount: float, idempotency_key: str = None):
+        self.paypal.make_payment(amount, request_id=idempotency_key)
+
+# Micro-batching adapter: individual pay() calls are queued and sent to the adaptee's
+# batch endpoint as one round trip, once `max_batch_size` payments are waiting or the
+# oldest one has waited `max_wait` seconds. The endpoint is called with the amounts and
+# their idempotency keys. pay() returns a Future that resolves to that payment's result
+# from the batch; a payment the endpoint returns no result for fails instead. A payment
+# whose Future is cancelled before its batch is sent is left out and never charged.
+class MicroBatchingAdapter(PaymentProcessor):
+    def __init__(self, batch_call, max_batch_size: int = 100, max_wait: float = 0.005):
+        self.batch_call = batch_call
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def pay(self, amount: float, idempotency_key: str = None) -> Future:
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Cannot pay after close")
+            self._queue.put((amount, idempotency_key, future))
+        return future
+
+    def _run(self):
+        closing = False
+        while not closing:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+            self._send(batch)
+
+    def _send(self, batch):
+        # Running futures can no longer be cancelled, so every one left can be resolved
+        batch = [item for item in batch if item[2].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            results = list(self.batch_call([amount for amount, _, _ in batch], [key for _, key, _ in batch]))
+        except Exception as exc:
+            for _, _, future in batch:
+                future.set_exception(exc)
+            return
+        for (_, _, future), result in zip(batch, results):
+            future.set_result(result)
+        for _, _, future in batch[len(results):]:
+            future.set_exception(RuntimeError(f"Batch endpoint returned {len(results)} results "
+                                              f"for {len(batch)} payments"))
+
+    def close(self):
+        """Flush queued payments and stop the batching thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(None)
+        self._thread.join()
+
+class StripeBatchAdapter(MicroBatchingAdapter):
+    def __init__(self, stripe_api: StripeAPI, **options):
+        super().__init__(stripe_api.charge_cards, **options)
+
+class PayPalBatchAdapter(MicroBatchingAdapter):
+    def __init__(self, paypal_api: PayPalAPI, **options):
+        super().__init__(paypal_api.make_payments, **options)
+
+# Local fake gateway with a fixed cost per round trip
+class FakeBatchGateway:
+    def __init__(self, round_trip: float = 0.02):
+        self.round_trip = round_trip
+        self.calls = 0
+
+    def charge_batch(self, amounts, idempotency_keys=None):
+        time.sleep(self.round_trip)
+        self.calls += 1
+        return [f"ch_{self.calls}_{i}" for i in range(len(amounts))]
+
+# Resilience wrapper: itself a PaymentProcessor, wrapping a primary and a secondary adapter.
+# - Hedging: if the primary has not answered within its observed p95 latency, a backup
+#   request goes to the secondary. Both carry the same idempotency key, so the payment
+#   is charged once whichever request lands -- but only if both adapters front the same
+#   idempotent ledger (e.g. two regions of one gateway). Hedging from Stripe to PayPal
+#   would charge the customer twice: PayPal never sees Stripe's idempotency keys.
+# - Circuit breaking: after `failure_threshold` consecutive failures an adapter is
+#   skipped for `reset_timeout` seconds, then one probe request is let through
+#   (half-open) to decide whether to close the circuit again.
+# Calls run on an internal thread pool; close() it (or use the processor as a context
+# manager) when done.
+class LatencyHistogram:
+    """Log-scale buckets (~10% wide) from 0.1 ms upwards."""
+    BASE = 1e-4
+    GROWTH = 1.1
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        bucket = max(0, int(math.log(max(seconds, self.BASE) / self.BASE, self.GROWTH)))
+        with self._lock:
+            self.counts[bucket] = self.counts.get(bucket, 0) + 1
+            self.total += 1
+
+    def percentile(self, p: float) -> float:
+        with self._lock:
+            rank = p * self.total
+            seen = 0
+            for bucket in sorted(self.counts):
+                seen += self.counts[bucket]
+                if seen >= rank:
+                    return self.BASE * self.GROWTH ** (bucket + 1)
+        return 0.0
+
+class CircuitOpenError(Exception):
+    pass
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 1.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True  # the single probe
+            return self.state == self.CLOSED
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+class ResilientPaymentProcessor(PaymentProcessor):
+    def __init__(self, primary: PaymentProcessor, secondary: PaymentProcessor,
+                 hedge_percentile: float = 0.95, min_samples: int = 50,
+                 default_hedge_delay: float = 0.05, workers: int = 32):
+        self.adapters = [primary, secondary]
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.default_hedge_delay = default_hedge_delay
+        self.histograms = {id(adapter): LatencyHistogram() for adapter in self.adapters}
+        self.breakers = {id(adapter): CircuitBreaker() for adapter in self.adapters}
+        self.hedges = 0
+        self._pool = ThreadPoolExecutor(workers)
+
+    def _hedge_delay(self, adapter) -> float:
+        histogram = self.histograms[id(adapter)]
+        if histogram.total < self.min_samples:
+            return self.default_hedge_delay
+        return histogram.percentile(self.hedge_percentile)
+
+    def _call(self, adapter, amount, idempotency_key):
+        start = time.perf_counter()
+        try:
+            result = adapter.pay(amount, idempotency_key=idempotency_key)
+        except Exception:
+            self.breakers[id(adapter)].record_failure()
+            raise
+        self.histograms[id(adapter)].record(time.perf_counter() - start)
+        self.breakers[id(adapter)].record_success()
+        return result
+
+    def pay(self, amount: float, idempotency_key: str = None):
+        idempotency_key = idempotency_key or uuid.uuid4().hex
+        candidates = list(self.adapters)
+        in_flight = set()
+        error = CircuitOpenError("All payment adapters are unavailable")
+        while True:
+            timeout = None
+            # Ask a breaker only when its adapter is about to be called, so a half-open
+            # probe is never taken for a request that is not sent
+            while candidates:
+                adapter = candidates.pop(0)
+                if self.breakers[id(adapter)].allow():
+                    if in_flight:
+                        self.hedges += 1
+                    in_flight.add(self._pool.submit(self._call, adapter, amount, idempotency_key))
+                    timeout = self._hedge_delay(adapter) if candidates else None
+                    break
+            if not in_flight:
+                raise error
+            done, in_flight = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                error = future.exception()
+
+    def close(self):
+        """Wait for in-flight calls (including hedges that lost the race) and stop the pool."""
+        self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+# Simulated gateway reachable through two adapters (e.g. two regions). It keeps a
+# ledger keyed by idempotency key, so duplicate hedged requests are charged once.
+class SimulatedGateway:
+    def __init__(self):
+        self.ledger = {}
+        self._lock = threading.Lock()
+
+    def charge(self, amount, idempotency_key):
+        with self._lock:
+            return self.ledger.setdefault(idempotency_key, (f"ch_{len(self.ledger)}", amount))[0]
+
+class SimulatedRegionAdapter(PaymentProcessor):
+    """Mostly fast, with a heavy (Pareto) tail on `tail_probability` of requests."""
+    def __init__(self, gateway: SimulatedGateway, base: float = 0.002,
+                 tail_probability: float = 0.05, seed: int = None):
+        self.gateway = gateway
+        self.base = base
+        self.tail_probability = tail_probability
+        self._random = random.Random(seed)
+
+    def pay(self, amount: float, idempotency_key: str = None):
+        latency = self.base * self._random.uniform(0.8, 1.5)
+        if self._random.random() < self.tail_probability:
+            latency += min(0.02 * self._random.paretovariate(1.5), 0.5)
+        time.sleep(latency)
+        return self.gateway.charge(amount, idempotency_key)
+
+def latency_percentiles(processor: PaymentProcessor, payments: int = 2000, callers: int = 16):
+    latencies = []
+
+    def timed_pay(i):
+        start = time.perf_counter()
+        processor.pay(1.0, idempotency_key=f"order-{i}")
+        latencies.append(time.perf_counter() - start)
+
+    with ThreadPoolExecutor(callers) as pool:
+        list(pool.map(timed_pay, range(payments)))
+    latencies.sort()
+    return {p: latencies[int(p * (len(latencies) - 1))] for p in (0.5, 0.95, 0.99)}
+
+# Async adapters: the same Adapter idea for asyncio code. Payments go over HTTP/1.1
+# keep-alive connections from a shared pool instead of blocking a thread per checkout.
+class AsyncPaymentProcessor:
+    async def pay(self, amount: float):
+        pass
+
+class PipelinedConnection:
+    """One keep-alive HTTP/1.1 connection. Requests are written without waiting for
+    earlier responses; a reader task matches responses to requests in order."""
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.waiting = deque()
+        self._reader_task = asyncio.create_task(self._read_responses())
+
+    @property
+    def in_flight(self) -> int:
+        return len(self.waiting)
+
+    @property
+    def closed(self) -> bool:
+        return self._reader_task.done()
+
+    async def request(self, host: str, path: str, payload: dict) -> dict:
+        body = json.dumps(payload).encode()
+        response = asyncio.get_running_loop().create_future()
+        self.waiting.append(response)
+        self.writer.write(f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                          f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await self.writer.drain()
+        return await response
+
+    async def _read_responses(self):
+        try:
+            while True:
+                status_line = await self.reader.readline()
+                if not status_line:
+                    raise ConnectionError("Gateway closed the connection")
+                length = 0
+                while (header := await self.reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = header.decode().partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                body = await self.reader.readexactly(length)
+                response = self.waiting.popleft()
+                if not response.done():  # the caller may have been cancelled
+                    response.set_result(json.loads(body))
+        except Exception as exc:
+            while self.waiting:
+                response = self.waiting.popleft()
+                if not response.done():
+                    response.set_exception(exc)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self._reader_task.cancel()
+
+class ConnectionPool:
+    """Keep-alive connections per (host, port), at most `max_per_host` of them, each
+    carrying up to `max_pipeline` outstanding requests. New connections are opened
+    outside the pool's lock in a reserved slot, so callers that can reuse an idle
+    connection never wait for another connection's setup."""
+    def __init__(self, max_per_host: int = 4, max_pipeline: int = 16):
+        self.max_per_host = max_per_host
+        self.max_pipeline = max_pipeline
+        self._connections = {}  # (host, port) -> [PipelinedConnection]
+        self._opening = {}      # (host, port) -> connections being opened
+        self._freed = asyncio.Condition()
+
+    async def request(self, host: str, port: int, path: str, payload: dict) -> dict:
+        connection = await self._acquire(host, port)
+        try:
+            return await connection.request(host, path, payload)
+        finally:
+            async with self._freed:
+                self._freed.notify()
+
+    async def _acquire(self, host, port) -> PipelinedConnection:
+        key = (host, port)
+        connections = self._connections.setdefault(key, [])
+        async with self._freed:
+            while True:
+                connections[:] = [c for c in connections if not c.closed]
+                idlest = min(connections, key=lambda c: c.in_flight, default=None)
+                slots = len(connections) + self._opening.get(key, 0)
+                if idlest is not None and (idlest.in_flight == 0 or slots >= self.max_per_host):
+                    if idlest.in_flight < self.max_pipeline:
+                        return idlest
+                elif slots < self.max_per_host:
+                    self._opening[key] = self._opening.get(key, 0) + 1
+                    break
+                await self._freed.wait()
+
+        connection = None
+        try:
+            connection = PipelinedConnection(*await asyncio.open_connection(host, port))
+            return connection
+        finally:
+            async with self._freed:
+                self._opening[key] -= 1
+                if connection is not None:
+                    connections.append(connection)
+                self._freed.notify_all()
+
+    async def close(self):
+        for connections in self._connections.values():
+            for connection in connections:
+                await connection.close()
+        self._connections.clear()
+
+async def post_without_pool(host: str, port: int, path: str, payload: dict) -> dict:
+    """Baseline: a fresh connection for every request."""
+    connection = PipelinedConnection(*await asyncio.open_connection(host, port))
+    try:
+        return await connection.request(host, path, payload)
+    finally:
+        await connection.close()
+
+class AsyncStripeAdapter(AsyncPaymentProcessor):
+    def __init__(self, host: str, port: int, pool: ConnectionPool = None):
+        self.host, self.port, self.pool = host, port, pool
+
+    async def pay(self, amount: float):
+        post = self.pool.request if self.pool else post_without_pool
+        return await post(self.host, self.port, "/v1/charges", {"amount": amount})
+
+class AsyncPayPalAdapter(AsyncPaymentProcessor):
+    def __init__(self, host: str, port: int, pool: ConnectionPool = None):
+        self.host, self.port, self.pool = host, port, pool
+
+    async def pay(self, amount: float):
+        post = self.pool.request if self.pool else post_without_pool
+        return await post(self.host, self.port, "/v1/payments", {"value": amount})
+
+# Local stub gateway: `handshake` simulates TLS setup on each new connection and
+# `latency` the processing time of each request. Pipelined requests on a connection are
+# processed concurrently and answered in order.
+class StubGateway:
+    def __init__(self, latency: float = 0.01, handshake: float = 0.02):
+        self.latency = latency
+        self.handshake = handshake
+        self._handlers = set()
+
+    async def start(self, port: int = 0) -> int:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", port)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    async def _respond(self, path, body):
+        await asyncio.sleep(self.latency)
+        payload = json.dumps({"status": "succeeded", "path": path, **json.loads(body)}).encode()
+        return (f"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(payload)}\r\n\r\n").encode() + payload
+
+    async def _write_in_order(self, writer, responses):
+        while (response := await responses.get()) is not None:
+            writer.write(await response)
+            await writer.drain()
+        writer.close()
+
+    async def _handle(self, reader, writer):
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        await asyncio.sleep(self.handshake)
+        responses = asyncio.Queue()
+        writer_task = asyncio.create_task(self._write_in_order(writer, responses))
+        try:
+            while request_line := await reader.readline():
+                length = 0
+                while (header := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = header.decode().partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                body = await reader.readexactly(length)
+                path = request_line.split()[1].decode()
+                responses.put_nowait(asyncio.create_task(self._respond(path, body)))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        responses.put_nowait(None)
+        await writer_task
+        self._handlers.discard(task)
+
+async def benchmark_async_checkouts(checkouts: int = 500):
+    gateway = StubGateway()
+    port = await gateway.start()
+    for label, pool in (("no pooling", None), ("pooled + pipelined", ConnectionPool())):
+        adapter = AsyncStripeAdapter("127.0.0.1", port, pool)
+        limit = asyncio.Semaphore(100)  # concurrent checkouts in flight
+
+        async def checkout_one(amount):
+            async with limit:
+                return await adapter.pay(amount)
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(checkout_one(i) for i in range(checkouts)))
+        elapsed = time.perf_counter() - start
+        assert all(result["status"] == "succeeded" for result in results)
+        print(f"⚡ {label}: {checkouts / elapsed:,.0f} checkouts/s")
+        if pool:
+            await pool.close()
+
+    # Cancelling one pipelined payment leaves the others on the connection unaffected
+    pool = ConnectionPool(max_per_host=1)
+    adapter = AsyncStripeAdapter("127.0.0.1", port, pool)
+    cancelled, other = asyncio.create_task(adapter.pay(1.0)), asyncio.create_task(adapter.pay(2.0))
+    await asyncio.sleep(gateway.handshake + gateway.latency / 2)
+    cancelled.cancel()
+    assert (await other)["amount"] == 2.0
+    assert (await adapter.pay(3.0))["amount"] == 3.0
+    await pool.close()
+    await gateway.stop()
+
+# Declarative adapters: describe how each target method maps onto the adaptee and let
+# build_adapter() generate a real class, the way dataclasses/namedtuple generate code.
+# __init__ caches the adaptee's bound methods, and each generated method is a single
+# direct call, so it costs the same as a hand-written adapter. DynamicAdapter is the
+# __getattr__-based alternative: it builds each method once on first access and caches
+# it on the instance, but still binds arguments and applies the mapping at call time.
+class MethodSpec:
+    def __init__(self, adaptee_method: str, params=(), args=None, kwargs=None, transforms=None):
+        self.adaptee_method = adaptee_method
+        self.params = tuple(params)                  # e.g. ("amount", "idempotency_key=None")
+        self.names = names = tuple(param.split("=")[0] for param in self.params)
+        self.defaults = {name: eval(default) for name, _, default in
+                         (param.partition("=") for param in self.params) if default}
+        self.args = tuple(names if args is None else args)  # positional args passed on
+        self.kwargs = dict(kwargs or {})             # adaptee keyword -> target param
+        self.transforms = dict(transforms or {})     # target param -> callable
+
+def build_adapter(name: str, target: type, methods: dict) -> type:
+    namespace = {}
+    lines = ["def __init__(self, adaptee):", "    self.adaptee = adaptee"]
+    for method_name, spec in methods.items():
+        lines.append(f"    self._{method_name} = adaptee.{spec.adaptee_method}")
+    for method_name, spec in methods.items():
+        def passed(param):
+            if param in spec.transforms:
+                namespace[f"_{method_name}_{param}"] = spec.transforms[param]
+                return f"_{method_name}_{param}({param})"
+            return param
+        call = [passed(arg) for arg in spec.args]
+        call += [f"{keyword}={passed(param)}" for keyword, param in spec.kwargs.items()]
+        lines.append(f"def {method_name}(self, {', '.join(spec.params)}):")
+        lines.append(f"    return self._{method_name}({', '.join(call)})")
+    exec("\n".join(lines), namespace)
+    body = {key: value for key, value in namespace.items() if not key.startswith("_") or key == "__init__"}
+    body["__module__"] = __name__
+    body["__slots__"] = ("adaptee",) + tuple(f"_{method_name}" for method_name in methods)
+    return type(name, (target,), body)
+
+class DynamicAdapter:
+    # Not a PaymentProcessor subclass, so that pay() falls through to __getattr__
+    def __init__(self, adaptee, methods: dict):
+        self.adaptee = adaptee
+        self.methods = methods
+
+    def __getattr__(self, method_name):
+        try:
+            spec = self.__dict__["methods"][method_name]
+        except KeyError:
+            raise AttributeError(method_name) from None
+        target = getattr(self.__dict__["adaptee"], spec.adaptee_method)
+        names, defaults, transforms = spec.names, spec.defaults, spec.transforms
+        args, kwargs = spec.args, spec.kwargs
+
+        def call(*values, **keywords):
+            if len(values) > len(names) or (keywords and not keywords.keys() <= set(names[len(values):])):
+                raise TypeError(f"{method_name}() got unexpected arguments")
+            bound = defaults.copy()
+            bound.update(zip(names, values))
+            if keywords:
+                bound.update(keywords)
+            if len(bound) < len(names):
+                raise TypeError(f"{method_name}() missing arguments: "
+                                f"{', '.join(name for name in names if name not in bound)}")
+            for param, transform in transforms.items():
+                bound[param] = transform(bound[param])
+            if not kwargs:
+                return target(*map(bound.__getitem__, args))
+            return target(*map(bound.__getitem__, args),
+                          **{keyword: bound[param] for keyword, param in kwargs.items()})
+        self.__dict__[method_name] = call  # later lookups skip __getattr__
+        return call
+
+STRIPE_METHODS = {"pay": MethodSpec("charge_card", ("amount", "idempotency_key=None"))}
+PAYPAL_METHODS = {"pay": MethodSpec("make_payment", ("amount", "idempotency_key=None"),
+                                    args=("amount",), kwargs={"request_id": "idempotency_key"})}
+
+GeneratedStripeAdapter = build_adapter("GeneratedStripeAdapter", PaymentProcessor, STRIPE_METHODS)
+GeneratedPayPalAdapter = build_adapter("GeneratedPayPalAdapter", PaymentProcessor, PAYPAL_METHODS)
 
 # Client code using the target interface
 def checkout(payment_processor: PaymentProcessor, amount: float):
@@ -47,3 +633,105 @@ if __name__ == "__main__":
 
     checkout(stripe_adapter, 50.0)
     checkout(paypal_adapter, 75.5)
+
+    batch_adapter = StripeBatchAdapter(StripeAPI(), max_batch_size=3)
+    receipts = [batch_adapter.pay(amount) for amount in (10.0, 20.0, 30.0, 40.0)]
+    batch_adapter.close()
+    print([receipt.result() for receipt in receipts])
+
+    # A batch endpoint that drops a result fails that payment instead of leaving it pending
+    short_adapter = MicroBatchingAdapter(lambda amounts, keys: ["ch_0"], max_batch_size=2)
+    receipts = [short_adapter.pay(amount, idempotency_key=f"order-{amount}") for amount in (1.0, 2.0)]
+    short_adapter.close()
+    print(receipts[0].result(), "/", receipts[1].exception(), "\n")
+
+    # A payment cancelled before its batch is sent is not charged; the rest still resolve
+    charged = []
+    cancel_adapter = MicroBatchingAdapter(lambda amounts, keys: charged.extend(amounts) or list(amounts),
+                                          max_batch_size=3, max_wait=0.1)
+    receipts = [cancel_adapter.pay(amount) for amount in (1.0, 2.0)]
+    assert receipts[0].cancel()
+    cancel_adapter.close()
+    assert charged == [2.0] and receipts[1].result(timeout=1) == 2.0
+    try:
+        cancel_adapter.pay(3.0)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("pay() after close() must raise")
+
+    # Throughput / latency tradeoff against a fake gateway (20 ms per round trip)
+    print("batch size | max wait | payments/s | mean latency")
+    for max_batch_size, max_wait in ((1, 0.0), (10, 0.005), (50, 0.01), (200, 0.05)):
+        gateway = FakeBatchGateway(round_trip=0.02)
+        adapter = MicroBatchingAdapter(gateway.charge_batch, max_batch_size, max_wait)
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(500):
+            submitted = time.perf_counter()
+            adapter.pay(1.0).add_done_callback(
+                lambda _, submitted=submitted: latencies.append(time.perf_counter() - submitted))
+            time.sleep(0.0005)  # ~2000 checkouts/s offered load
+        adapter.close()
+        elapsed = time.perf_counter() - start
+        print(f"{max_batch_size:>10} | {max_wait * 1000:>5.0f} ms | {500 / elapsed:>10,.0f} | "
+              f"{sum(latencies) / len(latencies) * 1000:>9.1f} ms")
+
+    print()
+    asyncio.run(benchmark_async_checkouts())
+
+    # Hedged requests under heavy-tailed gateway latency
+    print()
+    for label, hedged in (("primary only", False), ("hedged + circuit breaker", True)):
+        gateway = SimulatedGateway()
+        primary = SimulatedRegionAdapter(gateway, seed=1)
+        processor = ResilientPaymentProcessor(primary, SimulatedRegionAdapter(gateway, seed=2)) if hedged else primary
+        percentiles = latency_percentiles(processor)
+        assert len(gateway.ledger) == 2000  # every payment charged exactly once
+        hedges = f", {processor.hedges} hedges" if hedged else ""
+        if hedged:
+            processor.close()
+        print(f"🛡️ {label}: " + ", ".join(f"p{int(p * 100)} {v * 1000:.1f} ms" for p, v in percentiles.items()) + hedges)
+
+    # An open secondary is only probed when a hedge is actually sent to it
+    gateway = SimulatedGateway()
+    fast = SimulatedRegionAdapter(gateway, base=0.001, tail_probability=0.0, seed=3)
+    with ResilientPaymentProcessor(fast, SimulatedRegionAdapter(gateway, seed=4)) as processor:
+        secondary_breaker = processor.breakers[id(processor.adapters[1])]
+        secondary_breaker.state, secondary_breaker.opened_at = CircuitBreaker.OPEN, time.monotonic() - 60
+        for i in range(50):
+            processor.pay(1.0, idempotency_key=f"probe-{i}")
+        assert secondary_breaker.state == CircuitBreaker.OPEN and secondary_breaker.allow()
+
+    # Declarative adapters: generated vs hand-written vs __getattr__ proxy
+    print()
+    checkout(GeneratedStripeAdapter(StripeAPI()), 12.5)
+    checkout(GeneratedPayPalAdapter(PayPalAPI()), 7.25)
+
+    class QuietStripeAPI(StripeAPI):
+        def charge_card(self, amount, idempotency_key=None):
+            return amount
+
+    # Baseline proxy: forwards renamed methods through __getattr__ and caches them
+    class ForwardingAdapter:
+        def __init__(self, adaptee, names: dict):
+            self.adaptee = adaptee
+            self.names = names
+
+        def __getattr__(self, name):
+            try:
+                method = getattr(self.__dict__["adaptee"], self.__dict__["names"][name])
+            except KeyError:
+                raise AttributeError(name) from None
+            self.__dict__[name] = method
+            return method
+
+    api = QuietStripeAPI()
+    dynamic = DynamicAdapter(api, STRIPE_METHODS)
+    assert dynamic.pay(1.0, idempotency_key="order-1") == dynamic.pay(amount=1.0) == 1.0
+    for label, adapter in (("hand-written", StripeAdapter(api)),
+                           ("generated", GeneratedStripeAdapter(api)),
+                           ("caching __getattr__ forwarder", ForwardingAdapter(api, {"pay": "charge_card"})),
+                           ("dynamic proxy", dynamic)):
+        per_call = min(timeit.repeat(lambda: adapter.pay(1.0), number=200_000, repeat=3)) / 200_000
+        print(f"🏭 {label}: {per_call * 1e9:.0f} ns/call")
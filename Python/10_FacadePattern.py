@@ -1,6 +1,11 @@
 # Facade Pattern: Provides a simplified interface to a complex subsystem, making it easier to use and 
 #                 understand.
 
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import contextlib
+import io
+import time
+
 
 class Amplifier:
     def on(self):
@@ -129,6 +134,188 @@ class HomeTheaterFacade:
         self.dvd.off()
 
 
+# Scenes as dependency graphs: each step is one subsystem call. Steps on the same device
+# run in the order they were added; `after` adds cross-device ordering (the amp must be
+# routed to the DVD before playback starts). Independent devices run concurrently.
+class Step:
+    def __init__(self, name, device, method, args, after):
+        self.name = name
+        self.call = getattr(device, method)
+        self.args = args
+        self.after = set(after)
+
+class Scene:
+    def __init__(self, name):
+        self.name = name
+        self.steps = {}
+        self._last_on_device = {}
+
+    def add(self, name, device, method, *args, after=()):
+        after = set(after)
+        previous = self._last_on_device.get(id(device))
+        if previous:
+            after.add(previous)
+        self.steps[name] = Step(name, device, method, args, after)
+        self._last_on_device[id(device)] = name
+        return self
+
+    def run_serial(self):
+        for step in self.steps.values():
+            step.call(*step.args)
+
+    def run(self, max_workers=8):
+        waiting = {name: set(step.after) for name, step in self.steps.items()}
+        with ThreadPoolExecutor(max_workers) as pool:
+            running = {}
+
+            def launch_ready():
+                for name in [name for name, deps in waiting.items() if not deps]:
+                    del waiting[name]
+                    step = self.steps[name]
+                    running[pool.submit(step.call, *step.args)] = name
+
+            launch_ready()
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    future.result()
+                    finished = running.pop(future)
+                    for deps in waiting.values():
+                        deps.discard(finished)
+                launch_ready()
+        if waiting:
+            raise ValueError(f"Scene {self.name!r} has a dependency cycle: {sorted(waiting)}")
+
+class ParallelHomeTheaterFacade(HomeTheaterFacade):
+    def watch_movie_scene(self, movie):
+        return (Scene("watch_movie")
+                .add("popper_on", self.popper, "on")
+                .add("popper_pop", self.popper, "pop")
+                .add("lights_dim", self.lights, "dim", 10)
+                .add("screen_down", self.screen, "down")
+                .add("projector_on", self.projector, "on")
+                .add("projector_wide", self.projector, "wide_screen_mode")
+                .add("amp_on", self.amp, "on")
+                .add("amp_set_dvd", self.amp, "set_dvd", "DVD Player")
+                .add("amp_surround", self.amp, "set_surround_sound")
+                .add("amp_volume", self.amp, "set_volume", 5)
+                .add("dvd_on", self.dvd, "on")
+                .add("dvd_play", self.dvd, "play", movie,
+                     after=("amp_set_dvd", "projector_wide", "screen_down", "lights_dim")))
+
+    def end_movie_scene(self):
+        return (Scene("end_movie")
+                .add("popper_off", self.popper, "off")
+                .add("lights_on", self.lights, "on")
+                .add("screen_up", self.screen, "up")
+                .add("projector_off", self.projector, "off")
+                .add("amp_off", self.amp, "off")
+                .add("dvd_stop", self.dvd, "stop")
+                .add("dvd_eject", self.dvd, "eject")
+                .add("dvd_off", self.dvd, "off"))
+
+    def watch_movie(self, movie):
+        print("Get ready to watch a movie...")
+        self.watch_movie_scene(movie).run()
+
+    def end_movie(self):
+        print("Shutting movie theater down...")
+        self.end_movie_scene().run()
+
+# Desired-state reconciliation: a scene is the state each device should end up in. The
+# facade remembers the last state it set on every device and only issues the calls whose
+# state differs, so switching to a scene that is already active costs nothing. Powering
+# a device on drops its other cached settings (they may reset); powering it off keeps
+# them. invalidate() forgets a device that was changed outside the facade (e.g. by its
+# own remote).
+WATCH_MOVIE_STATE = [
+    ("popper", "power", True), ("lights", "level", 10), ("screen", "position", "down"),
+    ("projector", "power", True), ("projector", "mode", "wide"),
+    ("amp", "power", True), ("amp", "input", "DVD Player"), ("amp", "surround", True), ("amp", "volume", 5),
+    ("dvd", "power", True), ("dvd", "disc", "loaded"),
+]
+END_MOVIE_STATE = [
+    ("popper", "power", False), ("lights", "level", 100), ("screen", "position", "up"),
+    ("projector", "power", False), ("amp", "power", False),
+    ("dvd", "playing", None), ("dvd", "disc", None), ("dvd", "power", False),
+]
+
+class ReconcilingHomeTheaterFacade(HomeTheaterFacade):
+    def __init__(self, *subsystems):
+        super().__init__(*subsystems)
+        self.known = {}  # (device, attribute) -> last state set by the facade
+
+    def _setter(self, device, attribute, value):
+        subsystem = getattr(self, device)
+        if attribute == "power":
+            return subsystem.on if value else subsystem.off
+        if attribute == "level":
+            return subsystem.on if value == 100 else lambda: subsystem.dim(value)
+        if attribute == "position":
+            return subsystem.down if value == "down" else subsystem.up
+        if attribute == "mode":
+            return subsystem.wide_screen_mode
+        if attribute == "input":
+            return lambda: subsystem.set_dvd(value)
+        if attribute == "surround":
+            return subsystem.set_surround_sound
+        if attribute == "volume":
+            return lambda: subsystem.set_volume(value)
+        if attribute == "playing":
+            return (lambda: subsystem.play(value)) if value else subsystem.stop
+        if attribute == "disc":
+            return None if value else subsystem.eject  # discs are loaded by hand
+        raise ValueError(f"Unknown state {device}.{attribute}")
+
+    def reconcile(self, desired):
+        # Powering a device on may reset its settings, so it forgets what it knew about
+        # that device. Power-on goes first, so it never discards a state set earlier in
+        # the same scene. Powering off keeps the cached state: a second "off" scene
+        # then sends nothing to a device that is already off.
+        for device, attribute, value in sorted(desired, key=lambda state: not (state[1] == "power" and state[2])):
+            key = (device, attribute)
+            if key in self.known and self.known[key] == value:
+                continue
+            setter = self._setter(device, attribute, value)
+            if setter:
+                setter()
+            if attribute == "power" and value:
+                self.invalidate(device)
+            self.known[key] = value
+
+    def invalidate(self, device=None):
+        for key in [key for key in self.known if device is None or key[0] == device]:
+            del self.known[key]
+
+    def watch_movie(self, movie):
+        print("Get ready to watch a movie...")
+        self.reconcile(WATCH_MOVIE_STATE + [("dvd", "playing", movie)])
+        self.popper.pop()  # an action, not a state: always issued
+
+    def end_movie(self):
+        print("Shutting movie theater down...")
+        self.reconcile(END_MOVIE_STATE)
+
+
+# Simulates a networked device: every call costs one round trip
+class SimulatedLatency:
+    def __init__(self, device, latency=0.05):
+        self._device = device
+        self._latency = latency
+        self.calls = 0
+
+    def __getattr__(self, name):
+        attribute = getattr(self._device, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args):
+            self.calls += 1
+            time.sleep(self._latency)
+            return attribute(*args)
+        return call
+
+
 if __name__ == "__main__":
     amp = Amplifier()
     tuner = Tuner()
@@ -143,3 +330,41 @@ if __name__ == "__main__":
     home_theater.watch_movie("Raiders of the Lost Ark")
     print()
     home_theater.end_movie()
+
+    # Scene completion time with 50 ms per device call
+    devices = [SimulatedLatency(device) for device in (amp, tuner, dvd, cd, projector, screen, lights, popper)]
+    parallel_theater = ParallelHomeTheaterFacade(*devices)
+    print()
+    for label, run in (("serial", lambda scene: scene.run_serial()), ("dependency graph", lambda scene: scene.run())):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            run(parallel_theater.watch_movie_scene("Raiders of the Lost Ark"))
+            watch = time.perf_counter() - start
+            start = time.perf_counter()
+            run(parallel_theater.end_movie_scene())
+            end = time.perf_counter() - start
+        print(f"🎬 {label}: watch_movie {watch * 1000:.0f} ms, end_movie {end * 1000:.0f} ms")
+
+    # Calls saved by reconciliation on repeated scene switches
+    switches = ["watch", "watch", "end", "end", "watch", "end", "watch", "watch"]
+    for facade_type in (HomeTheaterFacade, ReconcilingHomeTheaterFacade):
+        counted = [SimulatedLatency(device, latency=0) for device in (amp, tuner, dvd, cd, projector, screen, lights, popper)]
+        facade = facade_type(*counted)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for switch in switches:
+                if switch == "watch":
+                    facade.watch_movie("Raiders of the Lost Ark")
+                else:
+                    facade.end_movie()
+        print(f"🔁 {facade_type.__name__}: {sum(device.calls for device in counted)} device calls "
+              f"for {len(switches)} scene switches")
+
+    # A repeated end_movie sends nothing: every device is already in its "off" state
+    counted = [SimulatedLatency(device, latency=0) for device in (amp, tuner, dvd, cd, projector, screen, lights, popper)]
+    facade = ReconcilingHomeTheaterFacade(*counted)
+    with contextlib.redirect_stdout(io.StringIO()):
+        facade.watch_movie("Raiders of the Lost Ark")
+        facade.end_movie()
+        calls = sum(device.calls for device in counted)
+        facade.end_movie()
+    assert sum(device.calls for device in counted) == calls
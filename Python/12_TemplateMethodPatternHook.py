@@ -5,16 +5,126 @@
 #                          override specific steps of the algorithm.
 
 from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import bz2
+import contextlib
+import gzip
+import io
+import lzma
+import os
+import sys
+import tempfile
+import time
+
+# Export instrumentation: with `instrument = True` (on the class or an instance) every
+# step of export() is timed, with the characters written and rows consumed during it
+# (for compress, the size of the compressed file). The per-export report is kept on
+# `last_report`, passed to `report_sink` if one is set, and folded into EXPORT_STATS,
+# which keeps per-exporter, per-step totals and a log2 histogram of step durations.
+# When disabled, export() pays for a single attribute check.
+class CountingWriter:
+    def __init__(self, file):
+        self.file = file
+        self.written = 0
+
+    def write(self, data):
+        self.written += len(data)
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+class RowCounter:
+    def __init__(self, rows):
+        self.rows = rows
+        self.count = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = next(self.rows)
+        self.count += 1
+        return row
+
+class ExportStats:
+    def __init__(self):
+        self.steps = {}  # (exporter, step) -> totals and histogram
+
+    def record(self, report):
+        for step in report["steps"]:
+            stats = self.steps.setdefault((report["exporter"], step["step"]),
+                                          {"runs": 0, "seconds": 0.0, "bytes": 0, "rows": 0, "histogram": {}})
+            stats["runs"] += 1
+            stats["seconds"] += step["seconds"]
+            stats["bytes"] += step["bytes"]
+            stats["rows"] += step["rows"]
+            bucket = 1 << int(step["seconds"] * 1e6).bit_length()  # upper bound in µs
+            stats["histogram"][bucket] = stats["histogram"].get(bucket, 0) + 1
+
+    def summary(self) -> str:
+        lines = []
+        for (exporter, step), stats in self.steps.items():
+            histogram = " ".join(f"<{bucket}µs:{count}" for bucket, count in sorted(stats["histogram"].items()))
+            lines.append(f"{exporter}.{step}: {stats['runs']} runs, {stats['seconds'] * 1000:.1f} ms, "
+                         f"{stats['bytes']:,} bytes, {stats['rows']:,} rows | {histogram}")
+        return "\n".join(lines)
+
+EXPORT_STATS = ExportStats()
 
 class DataExporter(ABC):
-    def export(self, data):
+    instrument = False
+    report_sink = None
+
+    def export(self, data, path=None):
+        self.path = path
+        if self.instrument:
+            return self._export_instrumented(data)
         self.open_file()
         self.write_data(data)
         self.compress()       # <-- Hook: optional step
         self.close_file()
 
+    def _export_instrumented(self, data):
+        rows = RowCounter(iter(data))
+        report = {"exporter": type(self).__name__, "path": self.path, "steps": []}
+
+        def step(name, call, *args):
+            writer = self.file if isinstance(getattr(self, "file", None), CountingWriter) else None
+            written, counted = (writer.written if writer else 0), rows.count
+            start = time.perf_counter()
+            try:
+                call(*args)
+            finally:
+                written = (writer.written if writer else 0) - written
+                compressed_path = getattr(self, "compressed_path", None) if name == "compress" else None
+                if compressed_path:
+                    written = os.path.getsize(compressed_path)
+                report["steps"].append({"step": name, "seconds": time.perf_counter() - start,
+                                        "bytes": written, "rows": rows.count - counted})
+
+        start = time.perf_counter()
+        step("open_file", self.open_file)
+        self.file = counter = CountingWriter(self.file)
+        try:
+            step("write_data", self.write_data, rows)
+            self.file = counter.file
+            step("compress", self.compress)
+        finally:
+            self.file = counter.file
+            step("close_file", self.close_file)
+            report["seconds"] = time.perf_counter() - start
+            report["bytes"] = counter.written
+            report["rows"] = rows.count
+            self.last_report = report
+            EXPORT_STATS.record(report)
+            if self.report_sink:
+                self.report_sink(report)
+
     def open_file(self):
         print("Opening file")
+        self.file = sys.stdout if self.path is None else open(self.path, "w", encoding="utf-8")
 
     @abstractmethod
     def write_data(self, data):
@@ -25,22 +135,71 @@ class DataExporter(ABC):
         pass
 
     def close_file(self):
+        if self.file is not sys.stdout:
+            self.file.close()
         print("Closing file")
 
+# Streaming block compression: the file is read `block_size` bytes at a time and each
+# block is compressed independently. gzip, bz2 and xz all accept a concatenation of
+# independently compressed streams as one valid file, so with threads > 1 the blocks are
+# compressed on a thread pool (zlib, bz2 and lzma release the GIL while compressing) and
+# written back in order, pigz-style. At most 2 * threads blocks are in memory at once.
+class Compressor:
+    CODECS = {
+        "gzip": (".gz", lambda block, level: gzip.compress(block, level, mtime=0)),
+        "bz2": (".bz2", lambda block, level: bz2.compress(block, level)),
+        "lzma": (".xz", lambda block, level: lzma.compress(block, preset=level)),
+    }
+
+    def __init__(self, method="gzip", level=6, threads=1, block_size=1 << 20):
+        self.extension, self._compress = self.CODECS[method]
+        self.level = level
+        self.threads = threads
+        self.block_size = block_size
+
+    def _blocks(self, src):
+        while block := src.read(self.block_size):
+            yield block
+
+    def compress_file(self, source_path, target_path=None):
+        target_path = target_path or source_path + self.extension
+        with open(source_path, "rb") as src, open(target_path, "wb") as dst:
+            if self.threads == 1:
+                for block in self._blocks(src):
+                    dst.write(self._compress(block, self.level))
+                return target_path
+
+            with ThreadPoolExecutor(self.threads) as pool:
+                in_flight = deque()
+                for block in self._blocks(src):
+                    in_flight.append(pool.submit(self._compress, block, self.level))
+                    if len(in_flight) >= 2 * self.threads:
+                        dst.write(in_flight.popleft().result())
+                while in_flight:
+                    dst.write(in_flight.popleft().result())
+        return target_path
+
 class CSVExporter(DataExporter):
+    def __init__(self, compressor=None):
+        self.compressor = compressor or Compressor()
+
     def write_data(self, data):
         print("Writing data as CSV:")
         for row in data:
-            print(",".join(str(x) for x in row))
+            self.file.write(",".join(str(x) for x in row) + "\n")
 
     def compress(self):
         print("Compressing CSV file...")
+        self.compressed_path = None
+        if self.file is not sys.stdout:
+            self.file.flush()
+            self.compressed_path = self.compressor.compress_file(self.path)
 
 class JSONExporter(DataExporter):
     def write_data(self, data):
         import json
         print("Writing data as JSON:")
-        print(json.dumps(data))
+        self.file.write(json.dumps(list(data)) + "\n")
 
     # No compress override — uses default (does nothing)
 
@@ -59,3 +218,45 @@ if __name__ == "__main__":
     print("\nJSON Export without compression:")
     exporter = JSONExporter()
     exporter.export(data)
+
+    # Compression throughput by codec, level and thread count on ~64 MB of CSV
+    print()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "export.csv")
+        rows = ([i, f"user{i}", i % 97, i * 0.25] for i in range(2_500_000))
+        exporter = CSVExporter(Compressor(threads=4))
+        exporter.export(rows, path)
+        size = os.path.getsize(path)
+        with gzip.open(exporter.compressed_path, "rb") as f:
+            assert f.read(9) == b"0,user0,0"
+
+        for method, level in (("gzip", 1), ("gzip", 6), ("gzip", 9), ("bz2", 9), ("lzma", 1)):
+            for threads in (1, 2, 4):
+                compressor = Compressor(method, level, threads)
+                start = time.perf_counter()
+                target = compressor.compress_file(path)
+                elapsed = time.perf_counter() - start
+                print(f"🗜️ {method} level {level}, {threads} threads: {size / elapsed / 1e6:.0f} MB/s, "
+                      f"ratio {size / os.path.getsize(target):.1f}")
+
+    # Per-step instrumentation, including the compress hook
+    print()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "export.out")
+        reports = []
+        DataExporter.instrument = True
+        DataExporter.report_sink = staticmethod(reports.append)
+        csv_exporter = CSVExporter(Compressor(level=1))
+        with contextlib.redirect_stdout(io.StringIO()):
+            for exporter in (csv_exporter, JSONExporter()):
+                for _ in range(3):
+                    exporter.export([[i, f"user{i}", i % 97] for i in range(200_000)], path)
+        DataExporter.instrument = False
+        # Instrumenting does not change exporter state
+        assert csv_exporter.compressed_path == path + ".gz"
+        assert reports[2]["steps"][2]["bytes"] == os.path.getsize(path + ".gz")
+        for report in (reports[0], reports[-1]):
+            print(f"{report['exporter']}: " + ", ".join(
+                f"{step['step']} {step['seconds'] * 1000:.1f} ms / {step['bytes']:,} B / {step['rows']:,} rows"
+                for step in report["steps"]))
+        print(EXPORT_STATS.summary())
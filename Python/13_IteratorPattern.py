@@ -1,10 +1,16 @@
 # Iterator Pattern: Provides a way to access elements of a collection without exposing its underlying 
 #                   representation.
 
-from collections.abc import Iterator, Iterable
+from array import array
+from collections.abc import Iterator, Iterable, Sequence
+import mmap
+import os
 import random
+import struct
 
 class Song:
+    __slots__ = ("title", "artist")
+
     def __init__(self, title, artist):
         self.title = title
         self.artist = artist
@@ -12,20 +18,80 @@ class Song:
     def __str__(self):
         return f"{self.title} by {self.artist}"
 
+# Lazy shuffle: a seeded pseudorandom permutation of the index range, built from a
+# Feistel network. Position i of the shuffled order is computed on demand, so shuffling
+# is O(1) in memory and time, the same seed always gives the same order, and iteration
+# can resume from any position. The network permutes the 2^(2k) values that cover n;
+# indices that land outside [0, n) are fed through again ("cycle walking") until they
+# fall inside, which keeps the result a permutation of range(n). Each of the 8 rounds
+# mixes with a keyed splitmix64 finalizer. A Feistel network over a few bits still
+# cannot reach every order equally often, so playlists up to SHUFFLE_EAGER_LIMIT songs
+# are shuffled eagerly with random.Random(seed) instead (see PlaylistIterator).
+SHUFFLE_EAGER_LIMIT = 1 << 16
+_MASK64 = (1 << 64) - 1
+
+class FeistelPermutation:
+    ROUNDS = 8
+
+    def __init__(self, n, seed=None):
+        self.n = n
+        self.seed = random.randrange(1 << 32) if seed is None else seed
+        self.half_bits = max(1, ((n - 1).bit_length() + 1) // 2)
+        self.mask = (1 << self.half_bits) - 1
+        rng = random.Random(self.seed)
+        self.keys = [rng.getrandbits(64) for _ in range(self.ROUNDS)]
+
+    def _round(self, value, key):
+        value = ((value ^ key) * 0xBF58476D1CE4E5B9) & _MASK64
+        value = ((value ^ (value >> 31)) * 0x94D049BB133111EB) & _MASK64
+        return (value >> 32) & self.mask
+
+    def _permute(self, index):
+        left, right = index >> self.half_bits, index & self.mask
+        for key in self.keys:
+            left, right = right, left ^ self._round(right, key)
+        return (left << self.half_bits) | right
+
+    def __getitem__(self, position):
+        if not 0 <= position < self.n:
+            raise IndexError(position)
+        index = self._permute(position)
+        while index >= self.n:
+            index = self._permute(index)
+        return index
+
+    def __len__(self):
+        return self.n
+
 class PlaylistIterator(Iterator):
     def __init__(self, playlist):
         self._playlist = playlist
         self._index = 0
-        self._order = list(range(len(self._playlist.songs)))  # normal order
+        self._count = len(self._playlist.songs)
+        self._order = None  # normal order
 
-    def set_shuffle(self):
-        random.shuffle(self._order)
+    def set_shuffle(self, seed=None):
+        seed = random.randrange(1 << 32) if seed is None else seed
+        if self._count <= SHUFFLE_EAGER_LIMIT:
+            self._order = list(range(self._count))
+            random.Random(seed).shuffle(self._order)
+        else:
+            self._order = FeistelPermutation(self._count, seed)
         self._index = 0
+        return seed
+
+    def seek(self, position):
+        """Resume from `position` in the current (normal or shuffled) order."""
+        self._index = position
+
+    @property
+    def position(self):
+        return self._index
 
     def __next__(self):
-        if self._index >= len(self._order):
+        if self._index >= self._count:
             raise StopIteration
-        song_index = self._order[self._index]
+        song_index = self._index if self._order is None else self._order[self._index]
         self._index += 1
         return self._playlist.songs[song_index]
 
@@ -39,6 +105,162 @@ class Playlist(Iterable):
     def __iter__(self):
         return PlaylistIterator(self)
 
+# Compact storage for large catalogs: a struct-of-arrays instead of one object per song.
+# Titles live in one UTF-8 heap with an array of end offsets, and artists are dictionary
+# encoded (each distinct name is stored once, songs keep a 4-byte artist id). Indexing
+# returns a SongView, a two-slot view that reads its fields from the columns on access.
+class SongView:
+    __slots__ = ("_store", "_index")
+
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+
+    @property
+    def title(self):
+        return self._store.title(self._index)
+
+    @property
+    def artist(self):
+        return self._store.artists[self._store.artist_ids[self._index]]
+
+    def __str__(self):
+        return f"{self.title} by {self.artist}"
+
+class SongStore(Sequence):
+    def __init__(self):
+        self.title_heap = bytearray()
+        self.title_ends = array("Q")
+        self.artist_ids = array("I")
+        self.artists = []
+        self._artist_codes = {}
+
+    def append(self, title, artist):
+        self.title_heap += title.encode()
+        self.title_ends.append(len(self.title_heap))
+        code = self._artist_codes.get(artist)
+        if code is None:
+            code = self._artist_codes[artist] = len(self.artists)
+            self.artists.append(artist)
+        self.artist_ids.append(code)
+
+    def title(self, index):
+        start = self.title_ends[index - 1] if index else 0
+        return self.title_heap[start:self.title_ends[index]].decode()
+
+    def __len__(self):
+        return len(self.title_ends)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return SongView(self, index)
+
+class CompactPlaylist(Playlist):
+    def __init__(self):
+        self.songs = SongStore()
+
+    def add_song(self, song):
+        self.songs.append(song.title, song.artist)
+
+# On-disk playlists: `<path>.heap` holds the UTF-8 titles and artist names back to back,
+# and `<path>.idx` is a fixed-width index with one record per song (title offset and
+# length, artist offset and length). Both files are opened with mmap, so opening a
+# playlist costs the same for ten songs or fifty million, and a song is only read from
+# disk when the iterator reaches it. Appends go to the end of both files (heap first,
+# so the index never points past the heap); within one writer an artist's name is
+# stored once and later songs reuse its offset. The maps are refreshed lazily when the
+# files have grown.
+class MappedSongStore(Sequence):
+    RECORD = struct.Struct("<QIQI")
+
+    def __init__(self, path):
+        self.path = path
+        self._index = open(path + ".idx", "a+b")
+        self._heap = open(path + ".heap", "a+b")
+        self._heap_size = self._heap.seek(0, os.SEEK_END)
+        self._count = self._index.seek(0, os.SEEK_END) // self.RECORD.size
+        self._index.truncate(self._count * self.RECORD.size)  # drop a torn last record
+        self._artist_offsets = {}
+        self._index_map = self._heap_map = None
+        self._mapped_count = -1
+
+    def _remap(self):
+        self._index.flush()
+        self._heap.flush()
+        self._unmap()
+        if self._count:
+            self._index_map = mmap.mmap(self._index.fileno(), 0, access=mmap.ACCESS_READ)
+            # An all-empty-strings playlist has an empty heap, which cannot be mapped
+            self._heap_map = mmap.mmap(self._heap.fileno(), 0, access=mmap.ACCESS_READ) if self._heap_size else b""
+        self._mapped_count = self._count
+
+    def _store_string(self, text):
+        data = text.encode()
+        offset = self._heap_size
+        self._heap.write(data)
+        self._heap_size += len(data)
+        return offset, len(data)
+
+    def append(self, title, artist):
+        self.extend(((title, artist),))
+
+    def extend(self, songs):
+        records = bytearray()
+        for title, artist in songs:
+            location = self._artist_offsets.get(artist)
+            if location is None:
+                location = self._artist_offsets[artist] = self._store_string(artist)
+            records += self.RECORD.pack(*self._store_string(title), *location)
+            self._count += 1
+        self._heap.flush()
+        self._index.write(records)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        if self._mapped_count != self._count:
+            self._remap()
+        title_offset, title_length, artist_offset, artist_length = \
+            self.RECORD.unpack_from(self._index_map, index * self.RECORD.size)
+        heap = self._heap_map
+        return Song(heap[title_offset:title_offset + title_length].decode(),
+                    heap[artist_offset:artist_offset + artist_length].decode())
+
+    def _unmap(self):
+        for mapped in (self._index_map, self._heap_map):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        self._index_map = self._heap_map = None
+
+    def close(self):
+        self._unmap()
+        self._index.close()
+        self._heap.close()
+
+class MappedPlaylist(Playlist):
+    def __init__(self, path):
+        self.songs = MappedSongStore(path)
+
+    def add_song(self, song):
+        self.songs.append(song.title, song.artist)
+
+    def close(self):
+        self.songs.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
 # Client code
 if __name__ == "__main__":
     playlist = Playlist()
@@ -57,3 +279,121 @@ if __name__ == "__main__":
     print("\nPlaying songs shuffled:")
     for song in iterator:
         print(song)
+
+    # Same seed, same order, and resuming part-way through
+    iterator = iter(playlist)
+    seed = iterator.set_shuffle(seed=7)
+    first = next(iterator)
+    resumed = iter(playlist)
+    resumed.set_shuffle(seed)
+    resumed.seek(1)
+    print(f"\nResuming shuffle {seed} after {first}:", ", ".join(str(song) for song in resumed))
+
+    # Time to first song and memory: eager list + shuffle vs lazy permutation
+    import time
+    import tracemalloc
+
+    catalog = Playlist()
+    catalog.songs = [Song("Track", "Artist")] * 2_000_000
+    def eager_shuffle():
+        order = list(range(len(catalog.songs)))
+        random.shuffle(order)
+        return catalog.songs[order[0]], order
+
+    def lazy_shuffle():
+        iterator = iter(catalog)
+        iterator.set_shuffle()
+        return next(iterator), iterator
+
+    for label, first_song in (("list + random.shuffle", eager_shuffle), ("lazy Feistel shuffle", lazy_shuffle)):
+        start = time.perf_counter()
+        first_song()
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        state = first_song()  # keep the order alive while measuring
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del state
+        print(f"🔀 {label}: first song after {elapsed * 1000:.3f} ms, {retained / 1e6:.1f} MB held "
+              f"for {len(catalog.songs):,} songs")
+
+    permutation = FeistelPermutation(100_003, seed=1)
+    assert sorted(permutation[i] for i in range(len(permutation))) == list(range(100_003))
+
+    # Small playlists: every order is about equally likely across seeds
+    from collections import Counter
+
+    small = Playlist()
+    small.songs = list(range(4))
+    orders = Counter()
+    for seed in range(24_000):
+        iterator = iter(small)
+        iterator.set_shuffle(seed)
+        orders[tuple(iterator)] += 1
+    assert len(orders) == 24 and all(800 <= count <= 1200 for count in orders.values())
+
+    # Bytes per song: plain objects with __dict__ vs __slots__ vs columnar store
+    class DictSong:
+        def __init__(self, title, artist):
+            self.title = title
+            self.artist = artist
+
+    count = 200_000
+    for label, library, song_type in (("Song with __dict__", Playlist(), DictSong),
+                                      ("Song with __slots__", Playlist(), Song),
+                                      ("CompactPlaylist", CompactPlaylist(), Song)):
+        tracemalloc.start()
+        for i in range(count):
+            # Artist strings are built per song, as they would be when read from a file or database
+            library.add_song(song_type(f"Song number {i}", f"Artist {i % 1000}"))
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"🎵 {label}: {retained / count:.0f} bytes/song")
+
+    compact = CompactPlaylist()
+    for song in (Song("Bohemian Rhapsody", "Queen"), Song("Imagine", "John Lennon"), Song("Radio Ga Ga", "Queen")):
+        compact.add_song(song)
+    print("Compact playlist:", ", ".join(str(song) for song in compact), f"({len(compact.songs.artists)} artists stored)")
+
+    # Cold start: open an on-disk playlist and stream the first 1000 songs, in order and shuffled
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "library")
+        count = 5_000_000
+        start = time.perf_counter()
+        with MappedPlaylist(path) as library:
+            for base in range(0, count, 100_000):
+                library.songs.extend((f"Song number {i}", f"Artist {i % 1000}") for i in range(base, base + 100_000))
+        print(f"\n💾 wrote {count:,} songs in {time.perf_counter() - start:.1f} s "
+              f"({(os.path.getsize(path + '.idx') + os.path.getsize(path + '.heap')) / 1e6:.0f} MB on disk)")
+
+        for label, shuffle in (("in order", False), ("shuffled", True)):
+            start = time.perf_counter()
+            with MappedPlaylist(path) as library:
+                iterator = iter(library)
+                if shuffle:
+                    iterator.set_shuffle(seed=3)
+                first_songs = [str(next(iterator)) for _ in range(1000)]
+                elapsed = time.perf_counter() - start
+            print(f"💾 cold start {label}: opened {count:,} songs and streamed 1000 in {elapsed * 1000:.1f} ms "
+                  f"(first: {first_songs[0]})")
+
+        with MappedPlaylist(path) as library:
+            iterator = iter(library)
+            library.add_song(Song("Bohemian Rhapsody", "Queen"))
+            assert str(library.songs[-1]) == "Bohemian Rhapsody by Queen"
+            assert str(next(iterator)) == "Song number 0 by Artist 0"
+        with MappedPlaylist(path) as library:
+            print(f"💾 reopened after append: {len(library.songs):,} songs, last is {library.songs[-1]}")
+
+        # A torn index record is dropped on open; empty strings need no heap at all
+        with open(path + ".idx", "ab") as f:
+            f.write(b"\x00" * 5)
+        with MappedPlaylist(path) as library:
+            library.add_song(Song("B", "Y"))
+            assert str(library.songs[-1]) == "B by Y" and len(library.songs) == count + 2
+        empty_path = os.path.join(tmp, "silence")
+        with MappedPlaylist(empty_path) as library:
+            library.add_song(Song("", ""))
+            assert str(library.songs[0]) == " by "
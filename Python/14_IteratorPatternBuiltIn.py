@@ -1,5 +1,11 @@
 from collections.abc import Iterator as PyIterator
 from abc import ABC, abstractmethod
+from bisect import insort
+from operator import attrgetter
+import heapq
+import math
+import time
+import weakref
 
 class MenuItem:
     def __init__(self, name, description, vegetarian, price):
@@ -21,15 +27,31 @@ class MenuItem:
         return self.price
 
 
+# Removal during iteration: remove() leaves a tombstone in the removed slot instead of
+# shifting every later item left, so each removal is O(1) and iteration order never
+# changes. Iterators skip tombstones. Once more than half of the slots are tombstones
+# the menu compacts its storage in one pass and moves every live iterator to the same
+# logical position, which keeps removal amortized O(1) and memory proportional to the
+# live items. Each iterator remembers the item its last next() returned; remove() acts
+# on that item only, once, so a compaction can never redirect it to a neighbour.
+_REMOVED = object()
+
+
 class DinerMenuIterator(PyIterator):
-    def __init__(self, items):
-        self.items = items
+    def __init__(self, menu):
+        self.menu = menu
+        self.items = menu.menu_items
         self.position = 0
+        self.last_returned = None
+        menu.iterators.add(self)
 
     def __next__(self):
-        if self.position >= len(self.items) or self.items[self.position] is None:
+        items = self.items
+        while self.position < len(items) and items[self.position] is _REMOVED:
+            self.position += 1
+        if self.position >= len(items):
             raise StopIteration
-        item = self.items[self.position]
+        item = self.last_returned = items[self.position]
         self.position += 1
         return item
 
@@ -39,11 +61,56 @@ class DinerMenuIterator(PyIterator):
     def remove(self):
         if self.position <= 0:
             raise Exception("You can't remove an item until you've done at least one next()")
-        if self.items[self.position - 1] is not None:
-            for i in range(self.position - 1, len(self.items) - 1):
-                self.items[i] = self.items[i + 1]
-            self.items[-1] = None
-            self.position -= 1
+        item, self.last_returned = self.last_returned, None
+        if item is not None and self.items[self.position - 1] is item:
+            self.items[self.position - 1] = _REMOVED
+            self.menu.item_removed(item)
+
+
+# Secondary indexes kept by each menu as items are added (and removed): items are
+# grouped by vegetarian flag and by price bucket, and each group is kept sorted by price.
+# items() walks the buckets in price order, so it yields a menu's matching items sorted
+# by price without looking at the rest of the menu. Removed items are remembered and
+# skipped, like the menu's own tombstones, and purged once they outnumber the rest.
+class MenuIndex:
+    def __init__(self, bucket_width=1.0):
+        self.bucket_width = bucket_width
+        self.buckets = ({}, {})  # non-vegetarian, vegetarian: bucket -> items sorted by price
+        self.size = 0
+        self.removed = set()  # ids of removed items still in a bucket
+
+    def add(self, item):
+        bucket = self.buckets[bool(item.vegetarian)].setdefault(int(item.price // self.bucket_width), [])
+        insort(bucket, item, key=attrgetter("price"))
+        self.size += 1
+
+    def remove(self, item):
+        self.removed.add(id(item))
+        if len(self.removed) > self.size // 2 + 16:
+            self.purge()
+
+    def purge(self):
+        removed = self.removed
+        for buckets in self.buckets:
+            for bucket in buckets.values():
+                bucket[:] = [item for item in bucket if id(item) not in removed]
+        self.size -= len(removed)
+        removed.clear()
+
+    def _items(self, buckets, max_price):
+        last = math.inf if max_price is None else int(max_price // self.bucket_width)
+        for number in sorted(number for number in buckets if number <= last):
+            for item in buckets[number]:
+                if max_price is not None and item.price > max_price:
+                    return
+                if id(item) not in self.removed:
+                    yield item
+
+    def items(self, vegetarian=None, max_price=None):
+        if vegetarian is not None:
+            return self._items(self.buckets[bool(vegetarian)], max_price)
+        return heapq.merge(*(self._items(buckets, max_price) for buckets in self.buckets),
+                           key=attrgetter("price"))
 
 
 class Menu(ABC):
@@ -53,39 +120,88 @@ class Menu(ABC):
 
 
 class DinerMenu(Menu):
-    MAX_ITEMS = 6
-
     def __init__(self):
-        self.menu_items = [None] * self.MAX_ITEMS
+        self.menu_items = []
         self.number_of_items = 0
+        self.iterators = weakref.WeakSet()
+        self.index = MenuIndex()
         self.add_item("Vegetarian BLT", "Fakin’ Bacon with lettuce & tomato", True, 2.99)
         self.add_item("BLT", "Bacon with lettuce & tomato", False, 2.99)
         self.add_item("Soup of the day", "Soup with side salad", False, 3.29)
 
     def add_item(self, name, description, vegetarian, price):
-        if self.number_of_items >= self.MAX_ITEMS:
-            print("Menu is full, can’t add item.")
-        else:
-            self.menu_items[self.number_of_items] = MenuItem(name, description, vegetarian, price)
-            self.number_of_items += 1
+        item = MenuItem(name, description, vegetarian, price)
+        self.menu_items.append(item)
+        self.number_of_items += 1
+        self.index.add(item)
+
+    def item_removed(self, item):
+        self.number_of_items -= 1
+        self.index.remove(item)
+        if len(self.menu_items) > 2 * self.number_of_items + 16:
+            self.compact()
+
+    def compact(self):
+        items = self.menu_items
+        waiting = sorted(self.iterators, key=lambda iterator: iterator.position, reverse=True)
+        live = 0
+        for index, item in enumerate(items):
+            while waiting and waiting[-1].position <= index:
+                waiting.pop().position = live
+            if item is not _REMOVED:
+                items[live] = item
+                live += 1
+        for iterator in waiting:
+            iterator.position = live
+        del items[live:]
 
     def create_iterator(self):
-        return DinerMenuIterator(self.menu_items)
+        return DinerMenuIterator(self)
 
 
 class PancakeHouseMenu(Menu):
     def __init__(self):
         self.menu_items = []
+        self.index = MenuIndex()
         self.add_item("Pancakes", "Pancakes with syrup", True, 2.99)
         self.add_item("Blueberry Pancakes", "Pancakes with blueberries", True, 3.49)
 
     def add_item(self, name, description, vegetarian, price):
-        self.menu_items.append(MenuItem(name, description, vegetarian, price))
+        item = MenuItem(name, description, vegetarian, price)
+        self.menu_items.append(item)
+        self.index.add(item)
 
     def create_iterator(self):
         return iter(self.menu_items)  # Uses Python's built-in iterator
 
 
+# Queries across any number of menus: each menu contributes its matching items sorted by
+# price (from its index when it has one, otherwise by filtering and sorting what
+# create_iterator() returns) and heapq.merge combines them lazily, holding one pending
+# item per menu. Results are generators, so asking for the ten cheapest items only
+# touches about ten items per menu.
+class MenuQuery:
+    def __init__(self, menus):
+        self.menus = menus
+
+    @staticmethod
+    def _sorted_items(menu, vegetarian, max_price):
+        index = getattr(menu, "index", None)
+        if index is not None:
+            return index.items(vegetarian, max_price)
+        return iter(sorted((item for item in menu.create_iterator()
+                            if (vegetarian is None or item.is_vegetarian() == vegetarian)
+                            and (max_price is None or item.get_price() <= max_price)),
+                           key=MenuItem.get_price))
+
+    def items(self, vegetarian=None, max_price=None):
+        return heapq.merge(*(self._sorted_items(menu, vegetarian, max_price) for menu in self.menus),
+                           key=MenuItem.get_price)
+
+    def vegetarian_under(self, max_price):
+        return self.items(vegetarian=True, max_price=max_price)
+
+
 class Waitress:
     def __init__(self, pancake_menu: Menu, diner_menu: Menu):
         self.pancake_menu = pancake_menu
@@ -107,3 +223,102 @@ if __name__ == "__main__":
     diner_menu = DinerMenu()
     waitress = Waitress(pancake_menu, diner_menu)
     waitress.print_menu()
+
+    # Removal-heavy workload: iterate over the menu and remove every item that is not
+    # vegetarian (two out of three), with the old shift-left removal for comparison
+    def shifting_removal(items):
+        position = 0
+        while position < len(items) and items[position] is not None:
+            position += 1
+            if not items[position - 1].vegetarian:
+                for i in range(position - 1, len(items) - 1):
+                    items[i] = items[i + 1]
+                items[-1] = None
+                position -= 1
+
+    def tombstone_removal(menu):
+        iterator = menu.create_iterator()
+        for item in iterator:
+            if not item.vegetarian:
+                iterator.remove()
+
+    for count in (10_000, 1_000_000):
+        menu = DinerMenu()
+        for i in range(count):
+            menu.add_item(f"Dish {i}", "Daily special", i % 3 == 0, 5.0 + i % 40)
+        items = list(menu.menu_items)
+        start = time.perf_counter()
+        tombstone_removal(menu)
+        elapsed = time.perf_counter() - start
+        kept = [item.name for item in menu.create_iterator()]
+        assert kept == [item.name for item in items if item.vegetarian]
+        assert len(menu.menu_items) <= 2 * menu.number_of_items + 16
+        print(f"\n🗑️ {count:,} items, tombstones: {elapsed * 1000:.0f} ms, {menu.number_of_items:,} left")
+        if count <= 10_000:
+            start = time.perf_counter()
+            shifting_removal(items)
+            print(f"🗑️ {count:,} items, shift left: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # Iterators that are part-way through keep their place across a compaction
+    menu = DinerMenu()
+    for i in range(100):
+        menu.add_item(f"Dish {i}", "Daily special", False, 5.0)
+    reader = menu.create_iterator()
+    for _ in range(60):
+        next(reader)
+    iterator = menu.create_iterator()
+    for item in iterator:
+        if item.name != "Dish 99":
+            iterator.remove()
+    assert len(menu.menu_items) < 103 and next(reader).name == "Dish 99"
+
+    # A second remove() is a no-op, even right after the first one triggered a compaction
+    menu = DinerMenu()
+    for i in range(40):
+        menu.add_item(f"D{i}", "Daily special", False, 5.0)
+    iterator = menu.create_iterator()
+    for item in iterator:
+        if item.name != "D1":
+            iterator.remove()
+            iterator.remove()
+    assert [item.name for item in menu.create_iterator()] == ["D1"]
+
+    # "All vegetarian items under $X sorted by price" across 1000 menus of 1000 items:
+    # merged index query vs a full scan of every menu's iterator
+    from itertools import islice
+
+    menus = []
+    for m in range(1000):
+        menu = PancakeHouseMenu() if m % 2 else DinerMenu()
+        for i in range(1000):
+            menu.add_item(f"Dish {m}-{i}", "House special", (m + i) % 3 == 0, round(4.0 + (m * 7 + i * 13) % 3000 / 100, 2))
+        menus.append(menu)
+    query = MenuQuery(menus)
+
+    def full_scan(max_price):
+        return sorted((item for menu in menus for item in menu.create_iterator()
+                       if item.is_vegetarian() and item.get_price() <= max_price), key=MenuItem.get_price)
+
+    for max_price in (6.0, 12.0):
+        start = time.perf_counter()
+        expected = full_scan(max_price)
+        scan = time.perf_counter() - start
+        start = time.perf_counter()
+        first_ten = list(islice(query.vegetarian_under(max_price), 10))
+        top = time.perf_counter() - start
+        start = time.perf_counter()
+        merged = list(query.vegetarian_under(max_price))
+        every = time.perf_counter() - start
+        assert [item.price for item in merged] == [item.price for item in expected]
+        assert first_ten == merged[:10]
+        print(f"🥗 vegetarian under ${max_price:.2f} ({len(merged):,} items): full scan {scan * 1000:.0f} ms, "
+              f"merged index {every * 1000:.0f} ms, first 10 in {top * 1000:.1f} ms")
+
+    # Indexes follow removals made through the iterator
+    iterator = menus[0].create_iterator()
+    for item in iterator:
+        if item.is_vegetarian():
+            iterator.remove()
+    assert not any(True for _ in MenuQuery(menus[:1]).vegetarian_under(100))
+    print("Cheapest across menus:", ", ".join(item.get_name() for item in
+                                              MenuQuery([PancakeHouseMenu(), DinerMenu()]).items(max_price=3.0)))